@@ -0,0 +1,325 @@
+"""
+Model Auto-Tune
+Measures how fast each candidate Whisper model decodes a call on this
+machine with different CPU thread counts, then picks the largest model
+that stays within a latency budget, using as few threads as possible so
+the rest of the CPU is left to the game.
+
+The decision is cached and only measured again when the machine, the
+candidates or the budget change (or with --force). Without a recorded call
+configured, the short speech clip RealtimeSTT ships for its own warm-up is
+timed; a decision made on synthetic noise, the last resort, is not cached.
+
+Candidates, the budget and the call to time are read from the
+"autotune" block of settings.json.
+
+Usage:
+    python autotune.py            # show the cached decision, measuring if needed
+    python autotune.py --force    # measure again
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import platform
+import statistics
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Length of the synthetic clip used without a recorded call
+SYNTHETIC_SECONDS = 3.0
+
+# Decoding of the synthetic clip stops here, about the length of a command
+MAX_COMMAND_TOKENS = 32
+
+
+def usable_cores() -> int:
+    """Number of cores this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_clip() -> Path:
+    """
+    RealtimeSTT's warm-up speech clip, found without importing RealtimeSTT
+
+    Returns:
+        Path of the clip, or None if RealtimeSTT is not installed
+    """
+    spec = importlib.util.find_spec("RealtimeSTT")
+    for location in (spec.submodule_search_locations or []) if spec else []:
+        path = Path(location) / "warmup_audio.wav"
+        if path.is_file():
+            return path
+    return None
+
+
+def clip_source(audio: str = None) -> str:
+    """Resolved path of the clip load_clip() times, or "synthetic" """
+    path = Path(audio) if audio else default_clip()
+    return str(path.resolve()) if path else "synthetic"
+
+
+def load_clip(audio: str = None):
+    """
+    Load the clip to time decoding with
+
+    Args:
+        audio: Recorded call (any format ffmpeg reads); None for RealtimeSTT's
+            warm-up clip, or quiet noise if that is missing
+
+    Returns:
+        Tuple of (float32 samples at 16 kHz, whether the clip is synthetic)
+    """
+    import numpy as np
+
+    path = audio or default_clip()
+    if path:
+        from faster_whisper import decode_audio
+
+        return decode_audio(str(path), sampling_rate=SAMPLE_RATE), False
+    rng = np.random.default_rng(0)
+    return rng.normal(0, 0.01, int(SYNTHETIC_SECONDS * SAMPLE_RATE)).astype(np.float32), True
+
+
+def measure(
+    model_name: str,
+    threads: int,
+    clip,
+    synthetic: bool = False,
+    compute_type: str = "int8",
+    beam_size: int = 5,
+    prompt: str = None,
+    runs: int = 3,
+) -> dict:
+    """
+    Time one model with a fixed number of CPU threads
+
+    The first transcription warms the model up and is not counted.
+
+    Returns:
+        Dict with model, threads, decode_ms (median), rtf and load_seconds
+    """
+    from faster_whisper import WhisperModel
+
+    started = time.perf_counter()
+    model = WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=threads)
+    load_seconds = time.perf_counter() - started
+
+    options = {"language": "en", "beam_size": beam_size, "initial_prompt": prompt}
+    if synthetic:
+        options["max_new_tokens"] = MAX_COMMAND_TOKENS
+
+    timings = []
+    for _ in range(runs + 1):
+        start = time.perf_counter()
+        segments, _ = model.transcribe(clip, **options)
+        for _ in segments:
+            pass
+        timings.append(time.perf_counter() - start)
+    del model
+
+    decode_seconds = statistics.median(timings[1:])
+    return {
+        "model": model_name,
+        "threads": threads,
+        "decode_ms": round(decode_seconds * 1000, 1),
+        "rtf": round(decode_seconds * SAMPLE_RATE / len(clip), 3),
+        "load_seconds": round(load_seconds, 2),
+    }
+
+
+def autotune(
+    models: list,
+    threads: list,
+    latency_budget_ms: float,
+    audio: str = None,
+    compute_type: str = "int8",
+    beam_size: int = 5,
+    prompt: str = None,
+) -> dict:
+    """
+    Measure the candidates and pick a model and thread count
+
+    Models are tried from first to last (smallest to largest), each with
+    the thread counts in ascending order, until one fits the budget. A
+    larger model never needs fewer threads, so its search starts at the
+    count the previous model needed, and it stops at the first model that
+    does not fit at all.
+
+    Args:
+        models: Candidate models, smallest first
+        threads: Candidate thread counts (capped at the usable cores)
+        latency_budget_ms: Longest acceptable decode time of one call
+        audio: Recorded call to time; None for the default clip (see load_clip)
+        compute_type: CTranslate2 compute type
+        beam_size: Beam size used by the recorder
+        prompt: Initial prompt used by the recorder
+
+    Returns:
+        Dict with stt_model, stt_threads, decode_ms, fits and measurements
+    """
+    clip, synthetic = load_clip(audio)
+    if synthetic:
+        logger.warning(
+            "No speech clip for auto-tune; timing quiet noise, which underestimates "
+            "decoding of real speech, so the choice is not cached"
+        )
+    cores = usable_cores()
+    threads = sorted({count for count in threads if 0 < count <= cores}) or [cores]
+
+    measurements = []
+    choice = None
+    first_thread = 0
+    for model_name in models:
+        fitted = None
+        for count in threads[first_thread:]:
+            try:
+                result = measure(
+                    model_name, count, clip, synthetic, compute_type, beam_size, prompt
+                )
+            except Exception as e:
+                logger.warning(f"Cannot measure '{model_name}': {e}")
+                break
+            measurements.append(result)
+            logger.info(
+                f"    {model_name:<12} {count:>2} threads {result['decode_ms']:8.0f}ms "
+                f"(RTF {result['rtf']:.2f})"
+            )
+            if result["decode_ms"] <= latency_budget_ms:
+                fitted = result
+                break
+        if fitted is None:
+            break  # Larger models will not fit either
+        choice = fitted
+        first_thread = threads.index(fitted["threads"])
+
+    fits = choice is not None
+    if not fits:
+        if not measurements:
+            raise RuntimeError("auto-tune could not measure any model")
+        choice = min(measurements, key=lambda m: m["decode_ms"])
+        logger.warning(
+            f"No model decodes a call within {latency_budget_ms:.0f}ms; "
+            f"using the fastest measured ('{choice['model']}', {choice['threads']} threads)"
+        )
+
+    return {
+        "stt_model": choice["model"],
+        "stt_threads": choice["threads"],
+        "decode_ms": choice["decode_ms"],
+        "fits": fits,
+        "synthetic": synthetic,
+        "measurements": measurements,
+    }
+
+
+def fingerprint(
+    models: list,
+    threads: list,
+    latency_budget_ms: float,
+    audio: str = None,
+    compute_type: str = "int8",
+    beam_size: int = 5,
+) -> dict:
+    """What a cached decision depends on; any change means measuring again"""
+    return {
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cores": usable_cores(),
+        "models": list(models),
+        "threads": list(threads),
+        "latency_budget_ms": latency_budget_ms,
+        "clip": clip_source(audio),
+        "compute_type": compute_type,
+        "beam_size": beam_size,
+    }
+
+
+def tune_cached(
+    cache_file: str,
+    force: bool = False,
+    prompt: str = None,
+    cached_only: bool = False,
+    **candidates,
+) -> dict:
+    """
+    Return the cached decision for these candidates, measuring if there is none
+
+    Args:
+        cache_file: JSON file holding the last decision
+        force: Measure even if the cached decision still applies
+        prompt: Initial prompt used by the recorder (does not invalidate the cache)
+        cached_only: Return None instead of measuring when nothing applicable is cached
+        candidates: Arguments of autotune() except prompt
+
+    Returns:
+        The autotune() decision plus fingerprint and tuned_at, or None
+    """
+    key = fingerprint(**candidates)
+    path = Path(cache_file)
+    if not force:
+        try:
+            cached = json.loads(path.read_text(encoding="utf-8"))
+            if cached.get("fingerprint") == key:
+                return cached
+        except (OSError, ValueError):
+            pass
+        if cached_only:
+            return None
+
+    logger.info(f"⏱️  Auto-tuning the speech model (budget {candidates['latency_budget_ms']:.0f}ms)...")
+    decision = autotune(prompt=prompt, **candidates)
+    decision["fingerprint"] = key
+    decision["tuned_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    if decision["synthetic"]:
+        return decision  # Too optimistic to keep; measured again next time
+
+    temp_path = path.with_name(path.name + ".tmp")
+    try:
+        temp_path.write_text(json.dumps(decision, indent=2), encoding="utf-8")
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to cache auto-tune decision: {e}")
+    return decision
+
+
+def print_table(decision: dict) -> None:
+    """Print every measurement and the decision"""
+    print(f"\n{'model':<14} {'threads':>7} {'decode':>9} {'RTF':>6} {'load':>7}")
+    print("-" * 47)
+    selected = (decision["stt_model"], decision["stt_threads"])
+    for m in decision["measurements"]:
+        chosen = " *" if (m["model"], m["threads"]) == selected else ""
+        print(
+            f"{m['model']:<14} {m['threads']:>7} {m['decode_ms']:>7.0f}ms "
+            f"{m['rtf']:>6.2f} {m['load_seconds']:>6.1f}s{chosen}"
+        )
+    print(
+        f"\nSelected '{decision['stt_model']}' with {decision['stt_threads']} threads "
+        f"(tuned {decision['tuned_at']}{'' if decision['fits'] else ', over budget'})"
+    )
+
+
+def main():
+    from main import ArtilleryCommandProcessor, Config, autotune_stt, recorder_options
+
+    parser = argparse.ArgumentParser(description="Pick the speech model and thread count for this machine")
+    parser.add_argument("--force", action="store_true", help="Measure even if a cached decision applies")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    options = recorder_options(ArtilleryCommandProcessor())
+    print_table(autotune_stt(options, Config.get_cpu_settings()["stt_threads"], force=args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Offline Batch Mode
+Re-scores logged transcripts with ArtilleryCommandProcessor, no microphone needed.
+
+Usage:
+    python batch.py transcripts.jsonl [more files ...] -o results.jsonl
+"""
+
+import argparse
+import collections
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from main import ArtilleryCommandProcessor, Config
+
+logger = logging.getLogger(__name__)
+
+# Fields checked, in order, for the transcript text of a JSONL record
+TEXT_FIELDS = ("text", "raw", "transcript")
+
+# Per-process processor, created once by the pool initializer
+_processor = None
+
+
+def iter_transcripts(paths: list, input_format: str):
+    """
+    Stream transcripts from JSONL or plain text files, one per line
+
+    Args:
+        paths: Input file paths ("-" reads stdin)
+        input_format: "jsonl", "text" or "auto" (by file extension)
+
+    Yields:
+        Tuples of (source, line_number, text); unreadable lines yield text None
+    """
+    for path in paths:
+        fmt = input_format
+        if fmt == "auto":
+            fmt = "jsonl" if path.endswith((".jsonl", ".json")) else "text"
+
+        f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+        try:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+
+                if fmt == "text":
+                    yield path, line_number, line
+                    continue
+
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield path, line_number, None
+                    continue
+
+                text = None
+                if isinstance(record, dict):
+                    text = next(
+                        (record[k] for k in TEXT_FIELDS if isinstance(record.get(k), str)),
+                        None,
+                    )
+                elif isinstance(record, str):
+                    text = record
+                yield path, line_number, text
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def iter_chunks(iterable, size: int):
+    """Split an iterable into lists of at most size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _init_worker(settings_file: str, log_level: int) -> None:
+    """Pool initializer: load settings and compile patterns once per process"""
+    global _processor
+    Config.SETTINGS_FILE = settings_file
+    logging.getLogger().setLevel(log_level)
+    _processor = ArtilleryCommandProcessor()
+
+
+def _process_chunk(chunk: list) -> list:
+    """
+    Run the processor over a chunk of (source, line_number, text) tuples
+
+    A multi-command transcript gives one result per command, all with the
+    same line number.
+    """
+    results = []
+    for source, line_number, text in chunk:
+        if text is None:
+            results.append({"source": source, "line": line_number, "error": "unreadable line"})
+            continue
+        for command in _processor.process_all(text):
+            results.append({"source": source, "line": line_number, **command})
+    return results
+
+
+def run_batch(
+    paths: list,
+    output,
+    workers: int,
+    chunk_size: int,
+    input_format: str = "auto",
+    log_level: int = logging.ERROR,
+) -> dict:
+    """
+    Process transcripts and stream results as JSONL, in input order
+
+    At most a few chunks per worker are in flight at any time, so memory
+    stays bounded regardless of input size.
+
+    Args:
+        paths: Input file paths
+        output: Writable text stream for JSONL results
+        workers: Number of worker processes (0 runs in this process)
+        chunk_size: Transcripts per task sent to a worker
+        input_format: "jsonl", "text" or "auto"
+        log_level: Log level for the processor inside workers
+
+    Returns:
+        Summary dict with total (input transcripts), commands (output
+        rows), status_codes and intents counts
+    """
+    status_codes = collections.Counter()
+    intents = collections.Counter()
+    total = 0
+    commands = 0
+    last_line = None
+
+    def write(results):
+        nonlocal total, commands, last_line
+        for result in results:
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            # Results arrive in input order; a multi-command line gives several
+            line = (result["source"], result["line"])
+            if line != last_line:
+                total += 1
+                last_line = line
+            if "error" in result:
+                status_codes["unreadable"] += 1
+                continue
+            commands += 1
+            status_codes[result["status_code"]] += 1
+            intents[result["intent"] or "<none>"] += 1
+
+    chunks = iter_chunks(iter_transcripts(paths, input_format), chunk_size)
+
+    if workers <= 0:
+        _init_worker(Config.SETTINGS_FILE, log_level)
+        for chunk in chunks:
+            write(_process_chunk(chunk))
+    else:
+        max_pending = workers * 4
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(Config.SETTINGS_FILE, log_level),
+        ) as pool:
+            pending = collections.deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_process_chunk, chunk))
+                if len(pending) >= max_pending:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    return {"total": total, "commands": commands, "status_codes": status_codes, "intents": intents}
+
+
+def print_summary(summary: dict, elapsed: float, stream=sys.stderr) -> None:
+    """Print status code and intent counts"""
+    total = summary["total"]
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Processed {total} transcripts ({summary['commands']} commands) "
+        f"in {elapsed:.1f}s ({rate:.0f}/s)",
+        file=stream,
+    )
+
+    print("Status codes:", file=stream)
+    for status, count in sorted(summary["status_codes"].items(), key=lambda kv: str(kv[0])):
+        print(f"  {status}: {count}", file=stream)
+
+    print("Intents:", file=stream)
+    for intent, count in summary["intents"].most_common():
+        print(f"  {intent}: {count}", file=stream)
+
+
+def main():
+    """Batch mode entry point"""
+    parser = argparse.ArgumentParser(
+        description="Re-score logged transcripts with the command processor"
+    )
+    parser.add_argument("inputs", nargs="+", help="JSONL or text files ('-' for stdin)")
+    parser.add_argument(
+        "-o", "--output", default="-", help="Results JSONL file (default: stdout)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=("auto", "jsonl", "text"),
+        default="auto",
+        help="Input format (default: by file extension)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes, 0 to run in-process (default: CPU count)",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=1000, help="Transcripts per worker task"
+    )
+    parser.add_argument(
+        "--settings", default=Config.SETTINGS_FILE, help="Settings file with command patterns"
+    )
+    parser.add_argument(
+        "--log-level", default="ERROR", help="Processor log level inside workers"
+    )
+    args = parser.parse_args()
+
+    Config.SETTINGS_FILE = args.settings
+    log_level = getattr(logging, args.log_level.upper(), logging.ERROR)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        summary = run_batch(
+            args.inputs,
+            output,
+            workers=args.workers,
+            chunk_size=max(1, args.chunk_size),
+            input_format=args.format,
+            log_level=log_level,
+        )
+    except KeyboardInterrupt:
+        logger.info("Interrupted")
+        sys.exit(130)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print_summary(summary, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
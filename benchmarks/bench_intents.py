@@ -0,0 +1,92 @@
+"""
+Micro-benchmark for intent matching at community command-pack scale
+
+Pads the configured intents with synthetic ones (both explicit regexes and
+auto-generated ones) and measures IntentMatcher.match per utterance, next to
+the previous sequential re.search loop. Intent order is shuffled to check
+that the winner does not depend on it.
+
+Usage (from the project root):
+    python -m benchmarks.bench_intents
+"""
+
+import logging
+import random
+import re
+import timeit
+
+from main import ArtilleryCommandProcessor, IntentMatcher
+
+UTTERANCES = [
+    "large smoke barrage grid 1 2 3 4 keypad 7",
+    "mortar shell grid 12345 67890",
+    "echo lima mortar barrage 17 grid 123 456",
+    "say again, all after grid",
+]
+
+WORDS = [
+    "alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf",
+    "hotel", "india", "juliet", "kilo", "lima", "mike", "november",
+]
+
+INTENT_COUNTS = [8, 100, 300, 1000]
+REPEATS = 200
+
+
+def legacy_detect(patterns: list, text: str):
+    """Previous implementation: first pattern in list order wins"""
+    for pattern, intent in patterns:
+        if re.search(pattern, text, re.IGNORECASE):
+            return intent
+    return None
+
+
+def build_patterns(processor: ArtilleryCommandProcessor, count: int, rng) -> list:
+    """Pad the configured patterns with synthetic intents up to count"""
+    patterns = list(processor.INTENT_PATTERNS)
+    index = 0
+    while len(patterns) < count:
+        first, second = rng.sample(WORDS, 2)
+        intent = f"{first}_{second}_mortar_barrage_{index}"
+        if index % 2:
+            pattern = processor._generate_pattern_from_intent(intent)
+        else:
+            pattern = rf"\b{first}\s+{second}\s+(?:mortar\s+)?barrage\s+{index}\b"
+        patterns.append((pattern, intent))
+        index += 1
+    return patterns
+
+
+def time_per_utterance(func) -> float:
+    """Average microseconds per utterance"""
+    elapsed = timeit.timeit(
+        lambda: [func(text) for text in UTTERANCES], number=REPEATS
+    )
+    return elapsed / (REPEATS * len(UTTERANCES)) * 1e6
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(1)
+    processor = ArtilleryCommandProcessor()
+
+    print(f"{'intents':>8} | {'matcher (us)':>12} | {'re.search loop (us)':>19} | order-independent")
+    print("-" * 66)
+    for count in INTENT_COUNTS:
+        patterns = build_patterns(processor, count, rng)
+        matcher = IntentMatcher(patterns)
+
+        shuffled = list(patterns)
+        rng.shuffle(shuffled)
+        shuffled_matcher = IntentMatcher(shuffled)
+        stable = all(
+            matcher.match(text) == shuffled_matcher.match(text) for text in UTTERANCES
+        )
+
+        matcher_us = time_per_utterance(matcher.match)
+        legacy_us = time_per_utterance(lambda text: legacy_detect(patterns, text))
+        print(f"{count:>8} | {matcher_us:>12.1f} | {legacy_us:>19.1f} | {stable}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Micro-benchmark for ArtilleryCommandProcessor._convert_words_to_digits
+
+Compares the single-pass tokenizer against the previous one-regex-per-word
+loop while the number-word vocabulary grows. The tokenizer's per-utterance
+cost should stay flat; the regex loop grows linearly with the vocabulary.
+
+Usage (from the project root):
+    python -m benchmarks.bench_normalizer
+"""
+
+import logging
+import re
+import timeit
+
+from main import ArtilleryCommandProcessor
+
+UTTERANCES = [
+    "Large smoke barrage, grid one, two, three, four, keypad seven.",
+    "mortar shell grid double five tree four fife six keypad niner",
+    "Medium mortar barrage grid 12345 67890",
+    "small barrage grid oh won too tree for fife sicks seven ate nine",
+]
+
+VOCABULARY_SIZES = [21, 100, 500, 2000]
+REPEATS = 200
+
+
+def legacy_convert(word_to_digit: dict, text: str) -> str:
+    """Previous implementation: one uncompiled re.sub per vocabulary entry"""
+    result = text.lower()
+    for word, digit in word_to_digit.items():
+        result = re.sub(r"\b" + word + r"\b", digit, result, flags=re.IGNORECASE)
+    return result
+
+
+def build_vocabulary(size: int) -> dict:
+    """Pad the real homophone table with synthetic entries up to size"""
+    vocabulary = dict(ArtilleryCommandProcessor.WORD_TO_DIGIT)
+    index = 0
+    while len(vocabulary) < size:
+        vocabulary[f"filler{index}word"] = str(index % 10)
+        index += 1
+    return vocabulary
+
+
+def time_per_utterance(func, repeats: int = REPEATS) -> float:
+    """Average microseconds per utterance"""
+    elapsed = timeit.timeit(
+        lambda: [func(text) for text in UTTERANCES], number=repeats
+    )
+    return elapsed / (repeats * len(UTTERANCES)) * 1e6
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    processor = ArtilleryCommandProcessor()
+
+    print(f"{'vocabulary':>10} | {'tokenizer (us)':>14} | {'regex loop (us)':>15}")
+    print("-" * 46)
+    for size in VOCABULARY_SIZES:
+        vocabulary = build_vocabulary(size)
+        processor._digit_words = vocabulary
+
+        tokenizer_us = time_per_utterance(processor._convert_words_to_digits)
+        # The regex loop gets slow quickly; scale its repeats down with size
+        legacy_us = time_per_utterance(
+            lambda text: legacy_convert(vocabulary, text),
+            repeats=max(3, REPEATS * 21 // size),
+        )
+        print(f"{size:>10} | {tokenizer_us:>14.1f} | {legacy_us:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Benchmark suite for the command-processing hot path
+
+Times each stage between "speech ended" and "command written" over a
+seeded set of synthetic utterances, and compares the results with a stored
+baseline. The exit status is 1 when any stage regresses beyond the
+threshold, so the suite can gate pattern or processor changes.
+
+Timings depend on the machine, so no baseline is shipped: the first full
+run on a machine records one and passes. Each repeat is summarized on its
+own and the gate compares the median of the per-repeat p50s, so one noisy
+pass does not fail it. Runs smaller than MIN_GATE_COUNT utterances only
+report.
+
+Usage (from the project root):
+    python -m benchmarks.run                     # compare (the first run records the baseline)
+    python -m benchmarks.run --save-baseline     # record benchmarks/baseline.json again
+    python -m benchmarks.run --no-gate           # only print the timings
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.utterances import generate_utterances
+from main import ArtilleryCommandProcessor, OutputHandler
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+# Smaller runs are too noisy to gate on or to record as a baseline
+MIN_GATE_COUNT = 1000
+
+# Stages timed on disk writes vary run to run far more than the parser; they
+# may slow down this many times the threshold before the gate fails
+IO_STAGES = {"save_command": 2.0}
+
+STAGES = (
+    "convert_words_to_digits",
+    "detect_intent",
+    "extract_and_convert_grid",
+    "save_command",
+    "process",
+    "process_all",
+)
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(utterances: list, repeats: int, output_dir: str) -> dict:
+    """
+    Time every stage for every utterance
+
+    Returns:
+        Dict of stage -> list of durations in microseconds
+    """
+    processor = ArtilleryCommandProcessor()
+    output_handler = OutputHandler(str(Path(output_dir) / "vox_command.json"))
+    timings = {stage: [] for stage in STAGES}
+    clock = time.perf_counter
+
+    for _ in range(repeats):
+        for utterance in utterances:
+            text = utterance["text"]
+
+            start = clock()
+            normalized = processor._convert_words_to_digits(text.strip())
+            timings["convert_words_to_digits"].append(clock() - start)
+
+            start = clock()
+            processor._detect_intent(normalized)
+            timings["detect_intent"].append(clock() - start)
+
+            start = clock()
+            processor._extract_and_convert_grid(normalized)
+            timings["extract_and_convert_grid"].append(clock() - start)
+
+            start = clock()
+            command = processor.process(text)
+            timings["process"].append(clock() - start)
+
+            start = clock()
+            processor.process_all(text)
+            timings["process_all"].append(clock() - start)
+
+            start = clock()
+            output_handler.save_command(command)
+            timings["save_command"].append(clock() - start)
+
+    return {
+        stage: [duration * 1e6 for duration in durations]
+        for stage, durations in timings.items()
+    }
+
+
+def summarize(timings: dict, repeats: int = 1) -> dict:
+    """
+    Mean, p50 and p95 per stage, in microseconds
+
+    gate_us is the median of the p50 of each repeat, which the regression
+    gate compares.
+    """
+    summary = {}
+    for stage, durations in timings.items():
+        ordered = sorted(durations)
+        size = len(durations) // max(repeats, 1)
+        passes = [sorted(durations[i * size:(i + 1) * size]) for i in range(repeats)] if size else [ordered]
+        summary[stage] = {
+            "mean_us": round(statistics.fmean(ordered), 2),
+            "p50_us": round(percentile(ordered, 0.50), 2),
+            "p95_us": round(percentile(ordered, 0.95), 2),
+            "gate_us": round(statistics.median(percentile(p, 0.50) for p in passes), 2),
+        }
+    return summary
+
+
+def check_accuracy(utterances: list) -> float:
+    """Fraction of utterances whose detected intent matches the generator's"""
+    processor = ArtilleryCommandProcessor()
+    correct = sum(
+        processor.process(utterance["text"])["intent"] == utterance["intent"]
+        for utterance in utterances
+    )
+    return correct / len(utterances) if utterances else 0.0
+
+
+def compare(summary: dict, baseline: dict, threshold: float, min_delta_us: float) -> list:
+    """
+    Compare the median per-repeat p50 of each stage against the baseline
+
+    Returns:
+        List of (stage, baseline_us, current_us) for stages that regressed
+    """
+    regressions = []
+    for stage, stats in summary.items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        before = previous.get("gate_us", previous["p50_us"])
+        after = stats["gate_us"]
+        allowed = threshold * IO_STAGES.get(stage, 1.0)
+        if after - before > min_delta_us and after > before * (1 + allowed):
+            regressions.append((stage, before, after))
+    return regressions
+
+
+def print_table(summary: dict, baseline: dict = None) -> None:
+    """Print per-stage timings, with the change from baseline if present"""
+    print(f"{'stage':<26} {'mean':>9} {'p50':>9} {'p95':>9} {'p50 vs baseline':>16}")
+    print("-" * 73)
+    for stage, stats in summary.items():
+        change = ""
+        previous = (baseline or {}).get("stages", {}).get(stage)
+        before = (previous or {}).get("gate_us") or (previous or {}).get("p50_us")
+        if before:
+            ratio = stats["gate_us"] / before - 1
+            change = f"{ratio:+.1%}"
+        print(
+            f"{stage:<26} {stats['mean_us']:>7.1f}us {stats['p50_us']:>7.1f}us "
+            f"{stats['p95_us']:>7.1f}us {change:>16}"
+        )
+
+
+def save_baseline(path: Path, summary: dict, args) -> None:
+    """Store this run as the baseline for this machine"""
+    path.write_text(
+        json.dumps(
+            {
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "count": args.count,
+                "repeats": args.repeats,
+                "seed": args.seed,
+                "stages": summary,
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the command-processing hot path")
+    parser.add_argument("--count", type=int, default=2000, help="Synthetic utterances")
+    parser.add_argument("--seed", type=int, default=1234, help="Generator seed")
+    parser.add_argument("--repeats", type=int, default=5, help="Passes over the utterances")
+    parser.add_argument(
+        "--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON file"
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store this run as the new baseline"
+    )
+    parser.add_argument(
+        "--no-gate",
+        action="store_true",
+        help="Print the timings without comparing them or failing",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed p50 slowdown per stage before failing (default: 0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--min-delta-us",
+        type=float,
+        default=1.0,
+        help="Ignore slowdowns smaller than this many microseconds",
+    )
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    utterances = generate_utterances(args.count, args.seed)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        # Warm-up pass so imports and regex caches are not measured
+        measure(utterances[:100], 1, output_dir)
+        summary = summarize(measure(utterances, args.repeats, output_dir), args.repeats)
+
+    accuracy = check_accuracy(utterances)
+    print(f"{len(utterances)} utterances x {args.repeats} repeats (seed {args.seed})")
+    print(f"Intent accuracy on generated utterances: {accuracy:.1%}\n")
+
+    baseline = None
+    if args.baseline.exists() and not (args.save_baseline or args.no_gate):
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    print_table(summary, baseline)
+
+    if args.no_gate:
+        return
+    if args.count < MIN_GATE_COUNT:
+        print(f"\nFewer than {MIN_GATE_COUNT} utterances: timings are reported, not gated or recorded")
+        return
+    if args.save_baseline or baseline is None:
+        if baseline is None and not args.save_baseline:
+            print(f"\nNo baseline at {args.baseline} yet; recording this run as the baseline")
+        save_baseline(args.baseline, summary, args)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    regressions = compare(summary, baseline, args.threshold, args.min_delta_us)
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%}:")
+        for stage, before, after in regressions:
+            print(f"  {stage}: {before:.1f}us -> {after:.1f}us")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
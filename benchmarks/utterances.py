@@ -0,0 +1,232 @@
+"""
+Seeded synthetic utterance generator
+
+Builds utterances that look like Whisper transcripts of artillery calls:
+every configured intent, all four MGRS precisions, keypads, homophones,
+comma-separated and "double"/"triple" digits, filler words and junk that
+is not a command. Each utterance carries the values it should parse to.
+
+Usage (from the project root):
+    python -m benchmarks.utterances --count 20 > utterances.jsonl
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+from main import ArtilleryCommandProcessor
+
+# Spoken forms of each digit, including the homophones Whisper produces
+SPOKEN_DIGITS = {}
+for _word, _digit in ArtilleryCommandProcessor.WORD_TO_DIGIT.items():
+    SPOKEN_DIGITS.setdefault(_digit, []).append(_word)
+
+PREFIXES = ["", "", "uh ", "okay ", "requesting ", "fire mission, ", "hey, "]
+SUFFIXES = ["", "", ".", " over", ", over.", " out", " please"]
+GRID_WORDS = ["grid", "grid", "grid", "at grid", "on grid", "grid reference"]
+KEYPAD_WORDS = ["keypad", "keypad", "keypad", "key pad"]
+
+JUNK = [
+    "say again",
+    "check check one two",
+    "can you hear me",
+    "where are the mortars",
+    "copy that, moving to the objective",
+    "reloading",
+    "negative, hold fire",
+    "grid",
+    "keypad seven",
+    "there are four of them at the tree line",
+]
+
+# Digit rendering styles and their relative weights
+DIGIT_STYLES = [
+    ("digits", 3),  # "12 34"
+    ("joined", 1),  # "1234"
+    ("words", 3),  # "one two three four"
+    ("comma", 2),  # "one, two, three, four"
+    ("homophones", 2),  # "won to tree for"
+    ("repeats", 1),  # "double five three four"
+]
+
+
+def sample_phrase(pattern: str, rng: random.Random) -> str:
+    """
+    Produce a random string matched by a simple intent pattern
+
+    Returns:
+        Sampled phrase, or None if the pattern uses unsupported constructs
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return None
+
+    out = []
+    if not _sample(parsed, rng, out):
+        return None
+    phrase = re.sub(r"\s+", " ", "".join(out)).strip()
+    if not re.search(pattern, phrase, re.IGNORECASE):
+        return None
+    return phrase
+
+
+def _sample(items, rng: random.Random, out: list) -> bool:
+    """Walk a parsed pattern, appending one possible match to out"""
+    for op, av in items:
+        if op is sre_parse.AT:
+            continue
+        elif op is sre_parse.LITERAL:
+            out.append(chr(av))
+        elif op is sre_parse.SUBPATTERN:
+            if not _sample(av[-1], rng, out):
+                return False
+        elif op is sre_parse.BRANCH:
+            if not _sample(rng.choice(av[1]), rng, out):
+                return False
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            low, high, item = av
+            for _ in range(low if low > 0 else rng.randint(0, min(high, 1))):
+                if not _sample(item, rng, out):
+                    return False
+        elif op is sre_parse.IN:
+            choices = []
+            for item_op, item_av in av:
+                if item_op is sre_parse.LITERAL:
+                    choices.append(chr(item_av))
+                elif item_op is sre_parse.CATEGORY and item_av is sre_parse.CATEGORY_SPACE:
+                    choices.append(" ")
+                elif item_op is sre_parse.RANGE:
+                    choices.append(chr(item_av[0]))
+            if not choices:
+                return False
+            out.append(rng.choice(choices))
+        else:
+            return False
+    return True
+
+
+def intent_phrase(pattern: str, intent: str, rng: random.Random) -> str:
+    """Spoken phrase for an intent, from its pattern or else its name"""
+    phrase = sample_phrase(pattern, rng)
+    if phrase:
+        return phrase
+    return intent.replace("call_", "").replace("_", " ")
+
+
+def speak_digits(digits: str, style: str, rng: random.Random) -> str:
+    """Render a string of digits the way a transcript might contain it"""
+    half = len(digits) // 2
+
+    if style == "digits":
+        return f"{digits[:half]} {digits[half:]}"
+    if style == "joined":
+        return digits
+    if style == "words":
+        return " ".join(SPOKEN_DIGITS[d][0] for d in digits)
+    if style == "comma":
+        return ", ".join(SPOKEN_DIGITS[d][0] for d in digits)
+    if style == "homophones":
+        return " ".join(rng.choice(SPOKEN_DIGITS[d]) for d in digits)
+
+    # "repeats": collapse runs of equal digits into "double"/"triple"
+    words = []
+    index = 0
+    while index < len(digits):
+        digit = digits[index]
+        run = 1
+        while index + run < len(digits) and digits[index + run] == digit and run < 3:
+            run += 1
+        word = SPOKEN_DIGITS[digit][0]
+        if run == 1:
+            words.append(word)
+        else:
+            words.append(f"{'double' if run == 2 else 'triple'} {word}")
+        index += run
+    return " ".join(words)
+
+
+def make_digits(precision: int, style: str, rng: random.Random) -> str:
+    """Random easting+northing digits; repeat style gets some doubled digits"""
+    digits = [str(rng.randint(0, 9)) for _ in range(precision * 2)]
+    if style == "repeats":
+        position = rng.randrange(len(digits) - 1)
+        digits[position + 1] = digits[position]
+    return "".join(digits)
+
+
+def generate_utterances(count: int, seed: int = 1234, patterns: list = None, junk_ratio: float = 0.1) -> list:
+    """
+    Build a reproducible list of synthetic utterances
+
+    Args:
+        count: Number of utterances
+        seed: Random seed; the same seed and patterns give the same list
+        patterns: List of (pattern, intent) tuples (default: settings.json)
+        junk_ratio: Fraction of utterances that are not commands
+
+    Returns:
+        List of dicts with text, intent, precision, easting, northing and keypad
+    """
+    rng = random.Random(seed)
+    if patterns is None:
+        patterns = ArtilleryCommandProcessor().INTENT_PATTERNS
+    styles = [style for style, _ in DIGIT_STYLES]
+    weights = [weight for _, weight in DIGIT_STYLES]
+
+    utterances = []
+    for index in range(count):
+        if patterns and rng.random() >= junk_ratio:
+            # Cycle through intents and precisions so every one is covered
+            pattern, intent = patterns[index % len(patterns)]
+            precision = 2 + (index // len(patterns)) % 4
+            style = rng.choices(styles, weights)[0]
+            digits = make_digits(precision, style, rng)
+            keypad = rng.randint(1, 9) if rng.random() < 0.5 else None
+
+            text = f"{intent_phrase(pattern, intent, rng)} {rng.choice(GRID_WORDS)} {speak_digits(digits, style, rng)}"
+            if keypad is not None:
+                text += f" {rng.choice(KEYPAD_WORDS)} {rng.choice(SPOKEN_DIGITS[str(keypad)])}"
+            text = rng.choice(PREFIXES) + text + rng.choice(SUFFIXES)
+            if rng.random() < 0.5:
+                text = text[0].upper() + text[1:]
+
+            utterances.append({
+                "text": text,
+                "intent": intent,
+                "precision": precision,
+                "easting": digits[:precision],
+                "northing": digits[precision:],
+                "keypad": keypad,
+            })
+        else:
+            utterances.append({
+                "text": rng.choice(JUNK),
+                "intent": None,
+                "precision": None,
+                "easting": None,
+                "northing": None,
+                "keypad": None,
+            })
+    return utterances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print synthetic utterances as JSONL")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    for utterance in generate_utterances(args.count, args.seed):
+        sys.stdout.write(json.dumps(utterance) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+Offline Recognition Evaluation
+Transcribes a recorded corpus with each Whisper model size, with and without
+the command-vocabulary prompt, and reports word error rate, intent and
+coordinate accuracy and throughput, so a smaller model can be checked before
+switching. Recordings are decoded in batches (faster-whisper batched
+inference) on one shared model, so large corpora finish quickly.
+
+Corpus manifest (JSONL), one recording per line. Audio paths are relative
+to the manifest; "text" is the reference transcript, and "text", "intent",
+"x" and "y" are all optional:
+    {"audio": "clips/001.wav", "text": "mortar shell grid 123 456 keypad 7", "intent": "mortar_shell"}
+
+Usage:
+    python evaluate.py corpus.jsonl --models tiny.en base.en small.en
+    python evaluate.py corpus.jsonl --models base.en --batch-size 16 --workers 2
+"""
+
+import argparse
+import collections
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from batch import iter_chunks
+from main import ArtilleryCommandProcessor, Config, build_vocabulary_prompt
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+DEFAULT_MODELS = ("tiny.en", "base.en", "small.en")
+
+# CTranslate2 uses 4 threads per worker on CPU
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 1) // 4)
+
+
+def load_corpus(manifest: str) -> list:
+    """
+    Read the corpus manifest
+
+    Returns:
+        List of dicts with audio (resolved path), text, intent, x and y
+        (None when not given)
+    """
+    base = Path(manifest).parent
+    corpus = []
+    with open(manifest, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                corpus.append({
+                    "audio": str(base / record["audio"]),
+                    "text": record.get("text"),
+                    "intent": record.get("intent"),
+                    "x": record.get("x"),
+                    "y": record.get("y"),
+                })
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"{manifest}:{line_number}: skipping bad record ({e})")
+    return corpus
+
+
+def normalize_words(processor: ArtilleryCommandProcessor, text: str) -> list:
+    """
+    Words of a transcript as the processor sees them
+
+    Spoken digits become numerals and digit runs are split into single
+    digits, so "one two three", "1 2 3" and "123" all score the same.
+    """
+    words = []
+    for token in processor.TOKEN_PATTERN.findall(processor._convert_words_to_digits(text.lower())):
+        if token.isdigit():
+            words.extend(token)
+        elif token[0].isalpha():
+            words.append(token)
+    return words
+
+
+def edit_distance(reference: list, hypothesis: list) -> int:
+    """Word-level Levenshtein distance"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,  # deletion
+                current[j - 1] + 1,  # insertion
+                previous[j - 1] + (ref_word != hyp_word),  # substitution
+            ))
+        previous = current
+    return previous[-1]
+
+
+def coordinates_match(command: dict, record: dict, tolerance: float) -> bool:
+    """True if the command's x and y are within tolerance of the expected ones"""
+    for axis in ("x", "y"):
+        expected = record[axis]
+        actual = command.get(axis)
+        if expected is not None and (actual is None or abs(actual - expected) > tolerance):
+            return False
+    return True
+
+
+def load_batch(records: list) -> list:
+    """Decode the audio of a batch of records to 16 kHz float32"""
+    from faster_whisper import decode_audio
+
+    return [decode_audio(record["audio"], sampling_rate=SAMPLE_RATE) for record in records]
+
+
+def transcribe_batch(pipeline, audio: list, prompt: str, beam_size: int) -> list:
+    """
+    Transcribe several recordings in one batched decode
+
+    The recordings are laid end to end and passed as separate clips, so the
+    pipeline encodes and decodes them as one batch. Each result segment
+    carries the offset of its clip (seek, in frames), which maps it back.
+    Clips longer than 30 s are cut to the first 30 s by the pipeline.
+
+    Args:
+        pipeline: faster_whisper BatchedInferencePipeline
+        audio: 16 kHz float32 audio per recording
+        prompt: Initial prompt, or None
+        beam_size: Beam size
+
+    Returns:
+        Transcript per recording, in order ("" for empty audio)
+    """
+    import numpy as np
+
+    clips = []
+    clip_index = {}
+    offset = 0
+    frames_per_second = pipeline.model.frames_per_second
+    for index, samples in enumerate(audio):
+        # Anything under one feature frame would collide with the next clip's seek
+        if len(samples) >= SAMPLE_RATE // frames_per_second:
+            clips.append({"start": offset, "end": offset + len(samples)})
+            clip_index[int(offset / SAMPLE_RATE * frames_per_second)] = index
+        offset += len(samples)
+
+    texts = [[] for _ in audio]
+    if clips:
+        segments, _ = pipeline.transcribe(
+            np.concatenate(audio),
+            language="en",
+            beam_size=beam_size,
+            initial_prompt=prompt,
+            clip_timestamps=clips,
+            batch_size=len(clips),
+        )
+        for segment in segments:
+            texts[clip_index[segment.seek]].append(segment.text.strip())
+    return [" ".join(parts) for parts in texts]
+
+
+def evaluate_model(model_name: str, corpus: list, prompt: str, args) -> dict:
+    """
+    Transcribe the corpus with one model and prompt setting
+
+    The corpus is read in batches of --batch-size recordings. --workers
+    threads decode audio and run batches on one shared model; at most two
+    batches per worker are in flight, so memory stays bounded for any
+    corpus size. Transcripts are scored in corpus order.
+
+    Args:
+        model_name: Whisper model name or path
+        corpus: Records from load_corpus
+        prompt: Initial prompt, or None
+        args: Parsed command line (device, compute_type, beam_size,
+            batch_size, workers, tolerance)
+
+    Returns:
+        Dict with wer, intent_accuracy, coordinate_accuracy, throughput
+        (audio seconds per wall second), rtf and per-record transcripts
+    """
+    import numpy as np
+    from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+    model = WhisperModel(
+        model_name, device=args.device, compute_type=args.compute_type, num_workers=args.workers
+    )
+    pipeline = BatchedInferencePipeline(model)
+    processor = ArtilleryCommandProcessor()
+
+    def run(records: list) -> tuple:
+        audio = load_batch(records)
+        return audio, transcribe_batch(pipeline, audio, prompt, args.beam_size)
+
+    # Warm-up, not measured
+    transcribe_batch(pipeline, [np.zeros(SAMPLE_RATE, dtype=np.float32)], prompt, args.beam_size)
+
+    errors = 0
+    reference_words = 0
+    intents_correct = 0
+    intents_total = 0
+    coordinates_correct = 0
+    coordinates_total = 0
+    audio_seconds = 0.0
+    transcripts = []
+
+    def score(records: list, audio: list, hypotheses: list) -> None:
+        nonlocal errors, reference_words, intents_correct, intents_total
+        nonlocal coordinates_correct, coordinates_total, audio_seconds
+        for record, samples, hypothesis in zip(records, audio, hypotheses):
+            audio_seconds += len(samples) / SAMPLE_RATE
+            if record["text"] is not None:
+                reference = normalize_words(processor, record["text"])
+                errors += edit_distance(reference, normalize_words(processor, hypothesis))
+                reference_words += len(reference)
+
+            command = processor.process(hypothesis)
+            if record["intent"] is not None:
+                intents_total += 1
+                intents_correct += command["intent"] == record["intent"]
+            if record["x"] is not None or record["y"] is not None:
+                coordinates_total += 1
+                coordinates_correct += coordinates_match(command, record, args.tolerance)
+            transcripts.append({
+                "audio": record["audio"],
+                "text": hypothesis,
+                "intent": command["intent"],
+                "x": command["x"],
+                "y": command["y"],
+            })
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        pending = collections.deque()
+        for records in iter_chunks(corpus, args.batch_size):
+            pending.append((records, pool.submit(run, records)))
+            if len(pending) >= args.workers * 2:
+                records, future = pending.popleft()
+                score(records, *future.result())
+        while pending:
+            records, future = pending.popleft()
+            score(records, *future.result())
+    wall_seconds = time.perf_counter() - start
+
+    return {
+        "model": model_name,
+        "prompt": prompt is not None,
+        "wer": errors / reference_words if reference_words else None,
+        "intent_accuracy": intents_correct / intents_total if intents_total else None,
+        "coordinate_accuracy": (
+            coordinates_correct / coordinates_total if coordinates_total else None
+        ),
+        "throughput": audio_seconds / wall_seconds if wall_seconds else 0.0,
+        "rtf": wall_seconds / audio_seconds if audio_seconds else 0.0,
+        "audio_seconds": round(audio_seconds, 2),
+        "wall_seconds": round(wall_seconds, 2),
+        "transcripts": transcripts,
+    }
+
+
+def print_table(results: list) -> None:
+    """Print WER, intent and coordinate accuracy and throughput per run"""
+    print(f"{'model':<14} {'prompt':<7} {'WER':>7} {'intent':>8} {'coords':>8} {'speed':>8}")
+    print("-" * 57)
+    for result in results:
+        columns = []
+        for key in ("wer", "intent_accuracy", "coordinate_accuracy"):
+            value = result[key]
+            columns.append("-" if value is None else f"{value:.1%}")
+        print(
+            f"{result['model']:<14} {'yes' if result['prompt'] else 'no':<7} "
+            f"{columns[0]:>7} {columns[1]:>8} {columns[2]:>8} "
+            f"{result['throughput']:>7.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare Whisper model sizes on a recorded command corpus"
+    )
+    parser.add_argument("manifest", help="Corpus manifest (JSONL)")
+    parser.add_argument(
+        "--models", nargs="+", default=list(DEFAULT_MODELS), help="Models to compare"
+    )
+    parser.add_argument(
+        "--no-baseline",
+        action="store_true",
+        help="Only run with the vocabulary prompt, not without it",
+    )
+    parser.add_argument("--device", default="cpu", help="cpu or cuda (default: cpu)")
+    parser.add_argument("--compute-type", default="int8", help="CTranslate2 compute type")
+    parser.add_argument(
+        "--beam-size",
+        type=int,
+        help="Beam size (default: stt_options.beam_size or 5)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=8, help="Recordings decoded together (default: 8)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Batches run in parallel on the shared model (default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.05, help="Allowed coordinate difference"
+    )
+    parser.add_argument(
+        "--settings", default=Config.SETTINGS_FILE, help="Settings file with command patterns"
+    )
+    parser.add_argument("-o", "--output", help="Also write full results, with transcripts, as JSON")
+    args = parser.parse_args()
+
+    Config.SETTINGS_FILE = args.settings
+    Config.set_settings(None)
+    logging.getLogger().setLevel(logging.WARNING)
+    if args.beam_size is None:
+        args.beam_size = Config.get_stt_options().get("beam_size", 5)
+    args.batch_size = max(1, args.batch_size)
+    args.workers = max(1, args.workers)
+
+    corpus = load_corpus(args.manifest)
+    if not corpus:
+        print(f"No recordings in {args.manifest}", file=sys.stderr)
+        sys.exit(1)
+
+    prompt = Config.get_stt_options().get("initial_prompt") or build_vocabulary_prompt(
+        ArtilleryCommandProcessor()
+    )
+    print(f"{len(corpus)} recordings, batches of {args.batch_size}, {args.workers} worker(s)")
+    print(f"Prompt: {prompt}\n")
+
+    results = []
+    for model_name in args.models:
+        prompts = [prompt] if args.no_baseline else [None, prompt]
+        for run_prompt in prompts:
+            results.append(evaluate_model(model_name, corpus, run_prompt, args))
+
+    print_table(results)
+    print(f"\n{results[0]['audio_seconds']:.1f}s of audio; speed is audio seconds per wall second")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {"cpu_count": os.cpu_count(), "prompt": prompt, "results": results}, f, indent=2
+            )
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Server Load Test
+Simulates several players talking to server.py at once and reports how
+command latency grows with the number of concurrent speakers.
+
+Each simulated speaker connects, streams recorded calls at real-time pace,
+keeps streaming silence until its command comes back, and then takes the
+next call. Latency is measured from the end of the call audio to the
+command arriving, so it includes the server's end-of-speech silence.
+
+Usage:
+    python loadtest.py clips/ --clients 1 2 4 8
+    python loadtest.py call1.wav call2.wav --clients 4 --utterances 20 -o load.json
+"""
+
+import argparse
+import json
+import queue
+import random
+import socket
+import sys
+import threading
+import time
+
+from main import Config
+from replay import find_audio_files, read_audio
+
+SAMPLE_RATE = 16000
+
+# Audio sent per write (30 ms)
+CHUNK_SAMPLES = 480
+SILENCE_CHUNK = bytes(CHUNK_SAMPLES * 2)
+
+
+def load_calls(paths: list) -> list:
+    """Read calls as 16 kHz 16-bit mono PCM bytes"""
+    import numpy as np
+
+    calls = []
+    for path in find_audio_files(paths):
+        samples, sample_rate = read_audio(path)
+        if sample_rate != SAMPLE_RATE:
+            positions = np.arange(0, len(samples), sample_rate / SAMPLE_RATE)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+        calls.append(samples.tobytes())
+    return calls
+
+
+def stream(sock: socket.socket, pcm: bytes) -> None:
+    """Send PCM in chunks at real-time pace"""
+    chunk_bytes = CHUNK_SAMPLES * 2
+    chunk_seconds = CHUNK_SAMPLES / SAMPLE_RATE
+    next_time = time.perf_counter()
+    for start in range(0, len(pcm), chunk_bytes):
+        sock.sendall(pcm[start:start + chunk_bytes])
+        next_time += chunk_seconds
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def receive(sock: socket.socket, commands: queue.Queue) -> None:
+    """Put (arrival time, command) on the queue for every command line received"""
+    buffer = b""
+    while True:
+        try:
+            data = sock.recv(65536)
+        except OSError:
+            return
+        if not data:
+            return
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line:
+                commands.put((time.perf_counter(), json.loads(line)))
+
+
+def time_call(sock: socket.socket, pcm: bytes, commands: queue.Queue, timeout: float) -> dict:
+    """
+    Send one call, then silence until its command arrives
+
+    Returns:
+        Dict with latency_ms (None if nothing came back in time) and status_code
+    """
+    stream(sock, pcm)
+    audio_end = time.perf_counter()
+    deadline = audio_end + timeout
+    while time.perf_counter() < deadline:
+        try:
+            arrived, command = commands.get_nowait()
+        except queue.Empty:
+            stream(sock, SILENCE_CHUNK)
+            continue
+        return {"latency_ms": (arrived - audio_end) * 1000, "status_code": command.get("status_code")}
+    return {"latency_ms": None, "status_code": None}
+
+
+def speaker(index: int, args, calls: list, start_barrier: threading.Barrier, results: list) -> None:
+    """One simulated player: send calls one after another and time each command"""
+    commands = queue.Queue()
+    rng = random.Random(index)
+    try:
+        with socket.create_connection((args.host, args.port)) as sock:
+            sock.sendall((json.dumps({"client": f"speaker-{index}"}) + "\n").encode("utf-8"))
+            threading.Thread(target=receive, args=(sock, commands), daemon=True).start()
+            start_barrier.wait()
+            time.sleep(rng.uniform(0, args.stagger))
+
+            for number in range(args.utterances):
+                pcm = calls[(index + number) % len(calls)]
+                results.append({"speaker": index, **time_call(sock, pcm, commands, args.timeout)})
+                # A short pause between calls, as on the radio
+                stream(sock, SILENCE_CHUNK * round(args.gap * SAMPLE_RATE / CHUNK_SAMPLES))
+    except (OSError, threading.BrokenBarrierError) as e:
+        start_barrier.abort()
+        print(f"speaker-{index}: stopped ({e or 'another speaker failed'})", file=sys.stderr)
+
+
+def run_level(clients: int, args, calls: list) -> dict:
+    """
+    Run one load level
+
+    Returns:
+        Dict with clients, utterances, missed and latency percentiles (ms)
+    """
+    results = []
+    barrier = threading.Barrier(clients)
+    threads = [
+        threading.Thread(target=speaker, args=(index, args, calls, barrier, results), daemon=True)
+        for index in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(r["latency_ms"] for r in results if r["latency_ms"] is not None)
+
+    def percentile(fraction: float):
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, max(0, round(fraction * len(latencies)) - 1))
+        return round(latencies[index], 1)
+
+    return {
+        "clients": clients,
+        "utterances": len(results),
+        "missed": len(results) - len(latencies),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "max_ms": round(latencies[-1], 1) if latencies else None,
+    }
+
+
+def print_table(levels: list) -> None:
+    """Print latency per load level"""
+    print(f"\n{'clients':>7} {'calls':>6} {'missed':>7} {'p50':>8} {'p95':>8} {'max':>8}")
+    print("-" * 49)
+    for level in levels:
+        columns = [
+            "-" if level[key] is None else f"{level[key]:.0f}ms" for key in ("p50_ms", "p95_ms", "max_ms")
+        ]
+        print(
+            f"{level['clients']:>7} {level['utterances']:>6} {level['missed']:>7} "
+            f"{columns[0]:>8} {columns[1]:>8} {columns[2]:>8}"
+        )
+
+
+def main():
+    settings = Config.get_server_settings()
+    parser = argparse.ArgumentParser(description="Load-test server.py with simulated speakers")
+    parser.add_argument("inputs", nargs="+", help="Recorded calls (WAV/FLAC files or directories)")
+    parser.add_argument(
+        "--clients", type=int, nargs="+", default=[1, 2, 4, 8], help="Concurrent speakers per run"
+    )
+    parser.add_argument("--utterances", type=int, default=10, help="Calls per speaker per run")
+    parser.add_argument("--host", default=settings["host"])
+    parser.add_argument("--port", type=int, default=settings["port"])
+    parser.add_argument(
+        "--stagger", type=float, default=1.0, help="Random start offset per speaker, in seconds"
+    )
+    parser.add_argument("--gap", type=float, default=0.5, help="Seconds of silence between calls")
+    parser.add_argument("--timeout", type=float, default=15.0, help="Seconds to wait for a command")
+    parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    calls = load_calls(args.inputs)
+    if not calls:
+        parser.error("no audio files")
+
+    try:
+        socket.create_connection((args.host, args.port), timeout=5).close()
+    except OSError as e:
+        print(f"Cannot reach the server at {args.host}:{args.port}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    levels = []
+    try:
+        for clients in args.clients:
+            print(f"Running {clients} speaker(s)...", file=sys.stderr)
+            levels.append(run_level(clients, args, calls))
+    except KeyboardInterrupt:
+        pass
+
+    print_table(levels)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"calls": len(calls), "levels": levels}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
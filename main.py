@@ -12,14 +12,32 @@ warnings.filterwarnings("ignore", message="pkg_resources is deprecated")
 os.environ["CT2_VERBOSE"] = "0"
 warnings.filterwarnings("ignore", message=".*compute type.*")
 
+import argparse
+import builtins
+import contextlib
+import functools
+import hashlib
+import importlib
+import importlib.util
 import json
 import logging
+import logging.handlers
+import platform
+import queue
 import re
+import sys
+import threading
 import time
+import types
+import uuid
+from collections import deque
 from pathlib import Path
 from typing import Optional
 
-from RealtimeSTT import AudioToTextRecorder
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
 
 
 # ====== Configuration ======
@@ -28,10 +46,44 @@ class Config:
 
     SETTINGS_FILE = "settings.json"
     OUTPUT_FILE = "vox_command.json"
+    JOURNAL_FILE = "vox_journal.jsonl"
+    SHM_FILE = "vox_command.shm"
+    SHM_MANIFEST_FILE = "vox_command.manifest.json"
+    METRICS_FILE = "vox_metrics.prom"
+    METRICS_JSON_FILE = "vox_metrics.json"
+    AUTOTUNE_FILE = "vox_autotune.json"
 
     # Default values
     DEFAULT_WAKE_WORD = "hey_jarvis"
     DEFAULT_STT_MODEL = "small.en"
+    DEFAULT_OUTPUT_MODE = "file"
+    DEFAULT_JOURNAL_MAX_BYTES = 1024 * 1024
+    DEFAULT_JOURNAL_BACKUPS = 3
+    DEFAULT_METRICS_FORMAT = "prometheus"
+    DEFAULT_METRICS_WINDOW = 500
+    DEFAULT_LOG_MODE = "normal"
+    DEFAULT_LOG_LEVEL = "INFO"
+    DEFAULT_RELOAD_INTERVAL = 1.0
+    DEFAULT_FUZZY_THRESHOLD = 0.8
+    DEFAULT_SERVER_PORT = 47810
+    DEFAULT_SERVER_MAX_BATCH = 8
+    # server.vad options and their types (keyword arguments of server.UtteranceSegmenter)
+    SERVER_VAD_OPTIONS = {
+        "aggressiveness": int,
+        "silence_seconds": float,
+        "pre_roll_seconds": float,
+        "min_speech_seconds": float,
+        "max_seconds": float,
+    }
+    DEFAULT_ACTIVATION = "wake_word"
+    DEFAULT_PUSH_TO_TALK_KEY = "ctrl_r"
+    ACTIVATION_MODES = ("wake_word", "push_to_talk")
+    DEFAULT_LATENCY_BUDGET_MS = 800
+    DEFAULT_AUTOTUNE_MODELS = ("tiny.en", "base.en", "small.en", "medium.en")
+    DEFAULT_AUTOTUNE_THREADS = (1, 2, 4, 8)
+    DEFAULT_ENDPOINT_GRACE_MS = 300
+    DEFAULT_REALTIME_MODEL = "tiny.en"
+    RUNTIME_PROFILES = ("full", "lean")
 
     # Load settings
     _settings = None
@@ -52,18 +104,147 @@ class Config:
                 cls._settings = {}
         return cls._settings
 
+    @classmethod
+    def set_settings(cls, settings: dict) -> None:
+        """Replace the cached settings (after a validated reload)"""
+        cls._settings = settings
+
+    @classmethod
+    def get_fuzzy_settings(cls, settings: dict = None) -> dict:
+        """
+        Get fuzzy intent matching settings (enabled, threshold) from settings or defaults
+
+        Args:
+            settings: Parsed settings to read instead of the cached ones
+        """
+        if settings is None:
+            settings = cls._load_settings()
+        fuzzy = settings.get("fuzzy_match", {})
+        return {
+            "enabled": bool(fuzzy.get("enabled", True)),
+            "threshold": float(fuzzy.get("threshold", cls.DEFAULT_FUZZY_THRESHOLD)),
+        }
+
+    @classmethod
+    def get_reload_interval(cls) -> float:
+        """Get how often settings.json is checked for changes, in seconds (0 = never)"""
+        settings = cls._load_settings()
+        return float(settings.get("reload_interval", cls.DEFAULT_RELOAD_INTERVAL))
+
     @classmethod
     def get_wake_word(cls) -> str:
         """Get wake word from settings or default"""
         settings = cls._load_settings()
         return settings.get("wake_word", cls.DEFAULT_WAKE_WORD)
 
+    @classmethod
+    def get_activation_settings(cls) -> dict:
+        """
+        Get how recording starts (mode, key) from settings or defaults
+
+        mode is "wake_word" (listen for the wake word, stop on silence) or
+        "push_to_talk" (record while key is held).
+        """
+        settings = cls._load_settings()
+        activation = settings.get("activation", {})
+        if isinstance(activation, str):
+            activation = {"mode": activation}
+        mode = activation.get("mode", cls.DEFAULT_ACTIVATION)
+        if mode not in cls.ACTIVATION_MODES:
+            logger.warning(f"Unknown activation mode '{mode}', using '{cls.DEFAULT_ACTIVATION}'")
+            mode = cls.DEFAULT_ACTIVATION
+        return {"mode": mode, "key": str(activation.get("key", cls.DEFAULT_PUSH_TO_TALK_KEY))}
+
+    @classmethod
+    def get_endpoint_settings(cls) -> dict:
+        """
+        Get early endpointing settings (enabled, grace_ms, realtime_model,
+        processing_pause) from settings or defaults
+        """
+        settings = cls._load_settings()
+        endpoint = settings.get("early_endpoint", {})
+        return {
+            "enabled": bool(endpoint.get("enabled", False)),
+            "grace_ms": float(endpoint.get("grace_ms", cls.DEFAULT_ENDPOINT_GRACE_MS)),
+            "realtime_model": endpoint.get("realtime_model", cls.DEFAULT_REALTIME_MODEL),
+            "processing_pause": float(endpoint.get("processing_pause", 0.1)),
+        }
+
+    @classmethod
+    def get_runtime_settings(cls) -> dict:
+        """
+        Get the runtime profile ("full" or "lean") and memory_budget_mb
+        (None = no budget) from settings or defaults
+        """
+        settings = cls._load_settings()
+        runtime = settings.get("runtime", {})
+        profile = runtime.get("profile", "full")
+        if profile not in cls.RUNTIME_PROFILES:
+            logger.warning(f"Unknown runtime profile '{profile}', using 'full'")
+            profile = "full"
+        budget = runtime.get("memory_budget_mb")
+        return {"profile": profile, "memory_budget_mb": float(budget) if budget else None}
+
     @classmethod
     def get_stt_model(cls) -> str:
         """Get STT model from settings or default"""
         settings = cls._load_settings()
         return settings.get("stt_model", cls.DEFAULT_STT_MODEL)
 
+    @classmethod
+    def get_autotune_settings(cls) -> dict:
+        """
+        Get model auto-tune settings from settings or defaults
+
+        Returns enabled, latency_budget_ms, models (smallest first),
+        threads, audio (a recorded call to time, or None) and cache_file.
+        """
+        settings = cls._load_settings()
+        autotune = settings.get("autotune", {})
+        audio = autotune.get("audio")
+        if audio:
+            audio = os.path.expanduser(os.path.expandvars(audio))
+        return {
+            "enabled": bool(autotune.get("enabled", False)),
+            "latency_budget_ms": float(
+                autotune.get("latency_budget_ms", cls.DEFAULT_LATENCY_BUDGET_MS)
+            ),
+            "models": list(autotune.get("models", cls.DEFAULT_AUTOTUNE_MODELS)),
+            "threads": [int(count) for count in autotune.get("threads", cls.DEFAULT_AUTOTUNE_THREADS)],
+            "audio": audio,
+            "cache_file": autotune.get("cache_file", cls.AUTOTUNE_FILE),
+        }
+
+    @classmethod
+    def get_cpu_settings(cls) -> dict:
+        """
+        Get CPU limits for the speech engines from settings (all optional)
+
+        Returns stt_threads and wakeword_threads (0 = library default) and
+        stt_affinity and wakeword_affinity (lists of core numbers, empty =
+        any core).
+        """
+        settings = cls._load_settings()
+        cpu = settings.get("cpu", {})
+        return {
+            "stt_threads": int(cpu.get("stt_threads", 0)),
+            "wakeword_threads": int(cpu.get("wakeword_threads", 0)),
+            "stt_affinity": [int(core) for core in cpu.get("stt_affinity", [])],
+            "wakeword_affinity": [int(core) for core in cpu.get("wakeword_affinity", [])],
+        }
+
+    @classmethod
+    def get_stt_options(cls) -> dict:
+        """Get extra AudioToTextRecorder options (beam_size, initial_prompt, ...) from settings"""
+        settings = cls._load_settings()
+        return dict(settings.get("stt_options", {}))
+
+    @classmethod
+    def get_vocabulary_prompt(cls) -> bool:
+        """Whether to prompt the recognizer with the command vocabulary (default: on)"""
+        settings = cls._load_settings()
+        return bool(settings.get("vocabulary_prompt", True))
+
     @classmethod
     def get_profile_path(cls) -> str:
         """Get full profile file path from settings or default"""
@@ -81,6 +262,104 @@ class Config:
             # Use current directory
             return cls.OUTPUT_FILE
 
+    @classmethod
+    def get_output_modes(cls) -> list:
+        """Get output modes ("file", "journal", "socket", "shm") from settings or default"""
+        settings = cls._load_settings()
+        modes = settings.get("output_mode", cls.DEFAULT_OUTPUT_MODE)
+        if isinstance(modes, str):
+            modes = [modes]
+        return list(modes) or [cls.DEFAULT_OUTPUT_MODE]
+
+    @classmethod
+    def get_journal_settings(cls) -> dict:
+        """Get journal rotation settings (max_bytes, backups) from settings or defaults"""
+        settings = cls._load_settings()
+        journal = settings.get("journal", {})
+        return {
+            "max_bytes": int(journal.get("max_bytes", cls.DEFAULT_JOURNAL_MAX_BYTES)),
+            "backups": int(journal.get("backups", cls.DEFAULT_JOURNAL_BACKUPS)),
+        }
+
+    @classmethod
+    def get_socket_settings(cls) -> dict:
+        """Get socket output settings (transport, host, port, path) from settings"""
+        settings = cls._load_settings()
+        return dict(settings.get("socket", {}))
+
+    @classmethod
+    def get_server_settings(cls) -> dict:
+        """
+        Get server mode settings from settings or defaults
+
+        Returns host, port, max_batch, batch_window_ms and vad (keyword
+        arguments for the utterance segmenter: aggressiveness,
+        silence_seconds, ...). Unknown or invalid vad options are dropped
+        with a warning.
+        """
+        settings = cls._load_settings()
+        server = settings.get("server", {})
+        vad = {}
+        for key, value in dict(server.get("vad", {})).items():
+            kind = cls.SERVER_VAD_OPTIONS.get(key)
+            if kind is None:
+                logger.warning(f"Unknown server.vad option '{key}', ignoring it")
+                continue
+            try:
+                vad[key] = kind(value)
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid server.vad.{key} {value!r}, using the default")
+                continue
+        if not 0 <= vad.get("aggressiveness", 3) <= 3:
+            logger.warning("server.vad.aggressiveness must be 0 to 3, using the default")
+            del vad["aggressiveness"]
+        vad.setdefault(
+            "silence_seconds", cls.get_stt_options().get("post_speech_silence_duration", 0.6)
+        )
+        return {
+            "host": server.get("host", "127.0.0.1"),
+            "port": int(server.get("port", cls.DEFAULT_SERVER_PORT)),
+            "max_batch": int(server.get("max_batch", cls.DEFAULT_SERVER_MAX_BATCH)),
+            "batch_window_ms": float(server.get("batch_window_ms", 0)),
+            "vad": vad,
+        }
+
+    @classmethod
+    def get_metrics_settings(cls, output_path: str) -> dict:
+        """
+        Get latency metrics settings (file, format, window) from settings or defaults
+
+        The metrics file defaults to the output directory, named after the format.
+        """
+        settings = cls._load_settings()
+        metrics = settings.get("metrics", {})
+        metrics_format = metrics.get("format", cls.DEFAULT_METRICS_FORMAT)
+        metrics_file = metrics.get("file")
+        if metrics_file:
+            metrics_file = os.path.expanduser(os.path.expandvars(metrics_file))
+        else:
+            default_name = cls.METRICS_JSON_FILE if metrics_format == "json" else cls.METRICS_FILE
+            metrics_file = str(Path(output_path).with_name(default_name))
+        return {
+            "file": metrics_file,
+            "format": metrics_format,
+            "window": int(metrics.get("window", cls.DEFAULT_METRICS_WINDOW)),
+        }
+
+    @classmethod
+    def get_logging_settings(cls) -> dict:
+        """Get logging settings (mode, level, jsonl_file) from settings or defaults"""
+        settings = cls._load_settings()
+        log_settings = settings.get("logging", {})
+        jsonl_file = log_settings.get("jsonl_file")
+        if jsonl_file:
+            jsonl_file = os.path.expanduser(os.path.expandvars(jsonl_file))
+        return {
+            "mode": log_settings.get("mode", cls.DEFAULT_LOG_MODE),
+            "level": log_settings.get("level", cls.DEFAULT_LOG_LEVEL),
+            "jsonl_file": jsonl_file,
+        }
+
     # Keypad layout for grid precision upgrade
     # 1 2 3
     # 4 5 6
@@ -106,13 +385,606 @@ class Config:
 
 
 # ====== Logging Setup ======
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%H:%M:%S",
-)
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+LOG_DATE_FORMAT = "%H:%M:%S"
+
+logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
 logger = logging.getLogger(__name__)
 
+# Per-command detail logged on the recognition path; the "quiet" logging
+# mode raises its level so each command logs a single summary line instead
+command_logger = logging.getLogger(f"{__name__}.command")
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Standard console format, but empty messages print as blank separator lines"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if record.msg == "" and not record.exc_info:
+            return ""
+        return super().format(record)
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line"""
+
+    # Structured values passed with extra={...} that are copied into the record
+    FIELDS = ("trace_id", "status_code", "intent", "x", "y", "latency_ms")
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for field in self.FIELDS:
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(mode: str = "normal", level: str = "INFO", jsonl_file: str = None):
+    """
+    Move log output off the calling threads
+
+    Records are put on a queue by the calling thread and formatted and
+    written by a background listener, so console and file I/O never block
+    recognition. Hot-path messages use %-style arguments, which are only
+    formatted when their level is enabled.
+
+    Args:
+        mode: "normal", or "quiet" for one line per command
+        level: Root log level name
+        jsonl_file: Optional file that also receives every record as a JSON line
+
+    Returns:
+        The started QueueListener; stop() it on exit to flush pending records
+    """
+    console = logging.StreamHandler()
+    console.setFormatter(ConsoleFormatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+    handlers = [console]
+    if jsonl_file:
+        try:
+            jsonl_handler = logging.FileHandler(jsonl_file, encoding="utf-8")
+            jsonl_handler.setFormatter(JsonLogFormatter())
+            jsonl_handler.addFilter(lambda record: record.msg != "")  # Skip separators
+            handlers.append(jsonl_handler)
+        except OSError as e:
+            logger.warning(f"Cannot open log file '{jsonl_file}': {e}")
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    # Quiet mode drops per-command errors too: the summary line already marks failures
+    command_logger.setLevel(logging.CRITICAL if mode == "quiet" else logging.NOTSET)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+# ====== Intent Matcher ======
+class IntentMatcher:
+    """
+    Matches command text against every intent pattern in a single scan
+
+    Patterns are compiled once into alternations with a named group per
+    intent, bucketed by the character they must start with so each text
+    position only tries the patterns that can begin there. Where the
+    alternation matches, every pattern of the bucket is tried at that
+    position and the longest match is kept (ties go to the more specific
+    pattern, i.e. the longer minimum match). When several intents appear
+    in the text the longest match wins, so the result does not depend on
+    the order of settings.json.
+    """
+
+    # Backreferences are numbered per pattern and break inside the alternation
+    _BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+    def __init__(self, patterns: list):
+        """
+        Compile intent patterns
+
+        Args:
+            patterns: List of (pattern, intent) tuples; invalid regexes are skipped
+        """
+        self.patterns = []
+        self._group_intents = {}
+        self._group_widths = {}  # Longest possible match of each group (capped)
+        self._buckets = {}  # First character -> (alternation, [(compiled, group), ...])
+        self._fallback = None
+        self._standalone = []
+
+        branches = []
+        for pattern, intent in patterns:
+            try:
+                compiled = re.compile(pattern, re.IGNORECASE)
+            except re.error as e:
+                logger.error(f"Invalid pattern for '{intent}': {pattern} ({e})")
+                continue
+
+            self.patterns.append((pattern, intent))
+            if compiled.groups and self._BACKREFERENCE.search(pattern):
+                self._standalone.append((compiled, intent))
+                continue
+
+            try:
+                parsed = sre_parse.parse(pattern, re.IGNORECASE)
+            except Exception:
+                self._standalone.append((compiled, intent))
+                continue
+
+            min_width, max_width = parsed.getwidth()
+            specificity = (min_width, min(max_width, 1 << 16))
+            branches.append((specificity, pattern, intent, self._first_chars(parsed)))
+
+        # Most specific first, ties broken by pattern text for a stable order
+        branches.sort(key=lambda branch: (-branch[0][0], -branch[0][1], branch[1]))
+
+        by_char = {}
+        unanchored = []
+        for index, (specificity, pattern, intent, first_chars) in enumerate(branches):
+            group = f"_i{index}"
+            self._group_intents[group] = intent
+            self._group_widths[group] = specificity[1]
+            alternative = (f"(?P<{group}>{pattern})", pattern, group)
+            if first_chars is None:
+                unanchored.append(alternative)
+            else:
+                for char in first_chars:
+                    by_char.setdefault(char, []).append(alternative)
+
+        for char, alternatives in by_char.items():
+            self._buckets[char] = self._compile_alternation(alternatives)
+        if unanchored:
+            self._fallback = self._compile_alternation(unanchored)
+
+    def _compile_alternation(self, alternatives: list) -> Optional[tuple]:
+        """
+        Compile named-group alternatives into one regex
+
+        Returns:
+            Tuple of (alternation, [(compiled pattern, group, max width), ...]
+            in alternation order), or None if they only work one by one
+        """
+        try:
+            alternation = re.compile(
+                "|".join(alternative for alternative, _, _ in alternatives),
+                re.IGNORECASE,
+            )
+        except re.error:
+            # e.g. a pattern with global inline flags; match those one by one
+            for _, pattern, group in alternatives:
+                entry = (re.compile(pattern, re.IGNORECASE), self._group_intents[group])
+                if entry not in self._standalone:
+                    self._standalone.append(entry)
+            return None
+        branches = [
+            (re.compile(pattern, re.IGNORECASE), group, self._group_widths[group])
+            for _, pattern, group in alternatives
+        ]
+        return alternation, branches
+
+    def _longest_at(self, branches: list, text: str, pos: int, match) -> tuple:
+        """
+        The longest of the patterns matching at pos
+
+        The alternation stops at the first branch that matches, which may
+        be shorter than a later one ("smoke mortar" before "smoke mortar
+        shell"), so every branch is tried; this only runs where the
+        alternation already matched, and skips branches that cannot match
+        anything longer.
+
+        Returns:
+            Tuple of (intent, start, end)
+        """
+        group, end = match.lastgroup, match.end()
+        for compiled, branch_group, max_width in branches:
+            if max_width <= end - pos:
+                continue
+            branch_match = compiled.match(text, pos)
+            if branch_match and branch_match.end() > end:
+                group, end = branch_group, branch_match.end()
+        return self._group_intents[group], pos, end
+
+    @classmethod
+    def _first_chars(cls, parsed) -> Optional[set]:
+        """
+        Find the lowercase characters a parsed pattern can start with
+
+        Returns:
+            Set of characters, or None if the pattern can start with anything
+        """
+        for op, av in parsed:
+            if op is sre_parse.AT:
+                continue  # \b, ^ and friends consume nothing
+            if op is sre_parse.LITERAL:
+                return {chr(av).lower()}
+            if op is sre_parse.SUBPATTERN:
+                return cls._first_chars(av[-1])
+            if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+                return cls._first_chars(av[2])
+            if op is sre_parse.BRANCH:
+                chars = set()
+                for branch in av[1]:
+                    branch_chars = cls._first_chars(branch)
+                    if branch_chars is None:
+                        return None
+                    chars |= branch_chars
+                return chars
+            if op is sre_parse.IN:
+                if any(item_op is not sre_parse.LITERAL for item_op, _ in av):
+                    return None
+                return {chr(item_av).lower() for _, item_av in av}
+            return None
+        return None
+
+    def candidates(self, text: str) -> list:
+        """
+        Find every intent mentioned in the text
+
+        Args:
+            text: Normalized command text
+
+        Returns:
+            List of non-overlapping (intent, start, end) tuples in text order
+        """
+        found = []
+        resume = 0
+        for pos, char in enumerate(text):
+            if pos < resume:
+                continue
+            bucket = self._buckets.get(char.lower())
+            if bucket is None:
+                continue
+            alternation, branches = bucket
+            match = alternation.match(text, pos)
+            if match and match.end() > pos:
+                candidate = self._longest_at(branches, text, pos, match)
+                found.append(candidate)
+                resume = candidate[2]
+
+        extra = []
+        if self._fallback is not None:
+            alternation, branches = self._fallback
+            for match in alternation.finditer(text):
+                if match.end() > match.start():
+                    extra.append(self._longest_at(branches, text, match.start(), match))
+        for compiled, intent in self._standalone:
+            match = compiled.search(text)
+            if match:
+                extra.append((intent,) + match.span())
+
+        if extra:
+            found.extend(extra)
+            found.sort(key=lambda candidate: candidate[1])
+        return found
+
+    def match(self, text: str) -> Optional[str]:
+        """
+        Resolve the text to a single intent
+
+        Args:
+            text: Normalized command text
+
+        Returns:
+            Intent of the longest (then earliest) match, or None
+        """
+        best = None
+        for intent, start, end in self.candidates(text):
+            if best is None or end - start > best[2] - best[1]:
+                best = (intent, start, end)
+        return best[0] if best else None
+
+
+# ====== Fuzzy Intent Index ======
+def edit_distance(a, b, limit: int = None) -> int:
+    """
+    Levenshtein distance between two strings (or sequences)
+
+    Args:
+        limit: Stop early once the distance must exceed limit, and return
+            limit + 1 instead
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over strings for edit-distance lookups
+
+    Each node's children are keyed by their distance to the node, so a
+    search within distance k only descends into children whose key lies
+    within k of the query's distance to the node (triangle inequality),
+    instead of comparing the query with every entry.
+    """
+
+    def __init__(self):
+        self._root = None  # [key, values, {distance: child}]
+
+    def add(self, key: str, value) -> None:
+        """Insert value under key (values of identical keys are grouped)"""
+        if self._root is None:
+            self._root = [key, [value], {}]
+            return
+        node = self._root
+        while True:
+            distance = edit_distance(key, node[0])
+            if distance == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, [value], {}]
+                return
+            node = child
+
+    def search(self, key: str, max_distance: int) -> list:
+        """
+        Find entries within max_distance of key
+
+        Returns:
+            List of (distance, key, values) tuples
+        """
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            # Distances beyond this rule out the node and all its children alike
+            limit = max_distance + max(node[2], default=0)
+            distance = edit_distance(key, node[0], limit)
+            if distance <= max_distance:
+                found.append((distance, node[0], node[1]))
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return found
+
+
+class FuzzyIntentIndex:
+    """
+    Resolves near-miss intent phrases ("mortal shell", "medium bearage")
+
+    Built once from the phrases each intent pattern can match. The words of
+    those phrases are indexed by a phonetic key in a BK-tree, so each word
+    of the text is compared only with vocabulary words that already sound
+    close, never with every intent. A phrase scores the mean of its words'
+    phonetic and spelling similarity (0-1). Like the exact matcher, the
+    longest phrase reaching the threshold wins, and a near-tie between two
+    intents is rejected as ambiguous.
+    """
+
+    # Most phrases generated from one pattern's alternatives and optionals
+    MAX_PHRASES_PER_PATTERN = 16
+
+    # Minimum score gap between the best and a competing intent
+    AMBIGUITY_MARGIN = 0.05
+
+    # Per-word lookups remembered between calls
+    WORD_CACHE_SIZE = 4096
+
+    # Phonetic rewrites applied in order before vowels are dropped
+    _PHONETIC_RULES = (
+        (re.compile(r"^kn|^gn|^pn|^wr"), lambda m: m.group()[1]),
+        (re.compile(r"ph"), "f"),
+        (re.compile(r"x"), "ks"),
+        (re.compile(r"[cs]h|tch"), "x"),
+        (re.compile(r"th"), "0"),
+        (re.compile(r"gh"), ""),
+        (re.compile(r"ck|q"), "k"),
+        (re.compile(r"c(?=[eiy])"), "s"),
+        (re.compile(r"g(?=[eiy])"), "j"),
+        (re.compile(r"c"), "k"),
+        (re.compile(r"z"), "s"),
+        (re.compile(r"v"), "f"),
+        (re.compile(r"d"), "t"),
+    )
+
+    def __init__(self, patterns: list, threshold: float = 0.8):
+        """
+        Build the index
+
+        Args:
+            patterns: List of (pattern, intent) tuples; patterns that cannot
+                be expanded into phrases fall back to the intent name
+            threshold: Minimum score to accept a match
+        """
+        self.threshold = threshold
+        self._phrases = {}  # first word -> [(words, intent)]
+        self._vocabulary = BKTree()
+        self._word_cache = {}
+
+        vocabulary = set()
+        for pattern, intent in patterns:
+            for phrase in self._expand(pattern) or [intent_display_name(intent)]:
+                words = tuple(phrase.split())
+                if words:
+                    self._phrases.setdefault(words[0], []).append((words, intent))
+                    vocabulary.update(words)
+        for word in sorted(vocabulary):
+            self._vocabulary.add(self.phonetic_key(word), word)
+
+    def match(self, text: str) -> Optional[tuple]:
+        """
+        Find the intent phrase closest to some run of words in the text
+
+        Args:
+            text: Normalized, lowercased command text
+
+        Returns:
+            Tuple of (intent, score, heard phrase), or None if nothing
+            reaches the threshold or the best match is ambiguous
+        """
+        words = re.findall(r"[a-z]+(?:'[a-z]+)*", text)
+        similar = [self._similar_words(word) for word in words]
+
+        candidates = []  # (word count, score, intent, heard)
+        for start, first_matches in enumerate(similar):
+            for first_word, first_score in first_matches.items():
+                for phrase_words, intent in self._phrases.get(first_word, ()):
+                    length = len(phrase_words)
+                    if start + length > len(words):
+                        continue
+                    total = first_score
+                    for offset in range(1, length):
+                        word_score = similar[start + offset].get(phrase_words[offset])
+                        if word_score is None:
+                            break
+                        total += word_score
+                    else:
+                        score = total / length
+                        if score >= self.threshold:
+                            heard = " ".join(words[start:start + length])
+                            candidates.append((length, score, intent, heard))
+
+        if not candidates:
+            return None
+        candidates.sort(key=lambda candidate: candidate[:2], reverse=True)
+        length, score, intent, heard = candidates[0]
+        for other_length, other_score, other_intent, _ in candidates[1:]:
+            if other_length < length:
+                break
+            if other_intent != intent:
+                if score - other_score < self.AMBIGUITY_MARGIN:
+                    command_logger.warning(
+                        "Ambiguous fuzzy intent match: '%s' could be %s or %s",
+                        heard, intent, other_intent,
+                    )
+                    return None
+                break
+        return intent, round(score, 3), heard
+
+    def _similar_words(self, word: str) -> dict:
+        """
+        Vocabulary words that sound like word
+
+        Returns:
+            Dict of vocabulary word -> similarity (0-1)
+        """
+        cached = self._word_cache.get(word)
+        if cached is not None:
+            return cached
+
+        key = self.phonetic_key(word)
+        max_distance = max(1, int(len(key) * (1 - self.threshold)))
+        similar = {}
+        for distance, vocabulary_key, vocabulary_words in self._vocabulary.search(key, max_distance):
+            phonetic = 1 - distance / max(len(key), len(vocabulary_key), 1)
+            for vocabulary_word in vocabulary_words:
+                spelling = 1 - edit_distance(word, vocabulary_word) / max(
+                    len(word), len(vocabulary_word)
+                )
+                similar[vocabulary_word] = (phonetic + spelling) / 2
+
+        if len(self._word_cache) >= self.WORD_CACHE_SIZE:
+            self._word_cache.clear()
+        self._word_cache[word] = similar
+        return similar
+
+    @classmethod
+    def phonetic_key(cls, word: str) -> str:
+        """
+        Reduce a word to a rough sound-alike key ("barrage", "bearage" -> "brj")
+
+        Similar-sounding consonants are merged, vowels after the first letter
+        and silent letters are dropped, and repeated letters are collapsed.
+        """
+        word = re.sub(r"[^a-z]", "", word.lower())
+        if not word:
+            return ""
+        for pattern, replacement in cls._PHONETIC_RULES:
+            word = pattern.sub(replacement, word)
+        first = "a" if word[0] in "aeiou" else word[0]
+        rest = re.sub(r"[aeiouyhw]", "", word[1:])
+        return re.sub(r"(.)\1+", r"\1", first + rest)
+
+    @classmethod
+    def _expand(cls, pattern: str) -> Optional[list]:
+        """
+        List the phrases a simple pattern matches ("(?:mortar\\s+)?shell" ->
+        ["shell", "mortar shell"])
+
+        Returns:
+            Lowercase phrases, or None if the pattern uses anything but
+            literals, alternatives, optionals and whitespace
+        """
+        try:
+            phrases = cls._expand_items(sre_parse.parse(pattern, re.IGNORECASE))
+        except Exception:
+            return None
+        if not phrases:
+            return None
+        return sorted({" ".join(phrase.lower().split()) for phrase in phrases} - {""})
+
+    @classmethod
+    def _expand_items(cls, items) -> Optional[list]:
+        """Expand a parsed (sub)pattern into the strings it matches"""
+        phrases = [""]
+        for op, av in items:
+            if op is sre_parse.AT:
+                continue
+            if op is sre_parse.LITERAL:
+                options = [chr(av)]
+            elif op is sre_parse.SUBPATTERN:
+                options = cls._expand_items(av[-1])
+            elif op is sre_parse.BRANCH:
+                options = []
+                for branch in av[1]:
+                    expanded = cls._expand_items(branch)
+                    if expanded is None:
+                        return None
+                    options.extend(expanded)
+            elif op is sre_parse.IN:
+                if av == [(sre_parse.CATEGORY, sre_parse.CATEGORY_SPACE)]:
+                    options = [" "]
+                elif all(item_op is sre_parse.LITERAL for item_op, _ in av):
+                    options = [chr(item_av) for _, item_av in av]
+                else:
+                    return None
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+                low, high, item = av
+                inner = cls._expand_items(item)
+                if inner is None:
+                    return None
+                if inner == [" "]:
+                    options = [" "]  # \s+, \s*
+                elif (low, high) == (0, 1):
+                    options = [""] + inner
+                elif (low, high) == (1, 1):
+                    options = inner
+                else:
+                    return None
+            else:
+                return None
+
+            if options is None:
+                return None
+            phrases = [phrase + option for phrase in phrases for option in options]
+            if len(phrases) > cls.MAX_PHRASES_PER_PATTERN:
+                return None
+        return phrases
+
 
 # ====== Artillery Command Processor ======
 class ArtilleryCommandProcessor:
@@ -143,42 +1015,52 @@ class ArtilleryCommandProcessor:
         "niner": "9",
     }
 
+    # Radio pronunciations worth spelling out in the recognizer prompt
+    RADIO_WORDS = ("niner",)
+
+    # Words that repeat the digit that follows them ("double five" -> "5 5")
+    REPEAT_WORDS = {
+        "double": 2,
+        "triple": 3,
+    }
+
+    # Tokenizer for lowercased text: words, digit runs, or punctuation runs
+    TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)*|\d+|[^\sa-z\d]+")
+
+    # Words that separate the commands of a multi-command utterance
+    COMMAND_SEPARATORS = frozenset({"then"})
+
     def __init__(self):
         """Initialize processor and load command patterns from settings"""
         self.INTENT_PATTERNS = self._load_patterns()
+        self._matchers = self.compile_matchers(self.INTENT_PATTERNS)
+
+        # Lookup table built once; per-token cost does not depend on its size
+        self._digit_words = {
+            word.lower(): digit for word, digit in self.WORD_TO_DIGIT.items()
+        }
 
     def _load_patterns(self) -> list:
         """
-        Load command patterns from settings.json
+        Load command patterns from the settings cached by Config
         Auto-generates patterns from intent names if not provided
 
         Returns:
             List of (pattern, intent) tuples
         """
+        if not Path(Config.SETTINGS_FILE).exists():
+            logger.warning(
+                f"Settings file not found: {Config.SETTINGS_FILE}, using defaults"
+            )
+            return self._get_default_patterns()
+
         try:
-            settings_path = Path(Config.SETTINGS_FILE)
-            if not settings_path.exists():
-                logger.warning(
-                    f"Settings file not found: {Config.SETTINGS_FILE}, using defaults"
-                )
+            settings = Config._load_settings()
+            if "commands" not in settings:
+                logger.warning("No commands in settings, using defaults")
                 return self._get_default_patterns()
 
-            with open(settings_path, "r") as f:
-                settings = json.load(f)
-
-            patterns = []
-            for cmd in settings.get("commands", []):
-                intent = cmd.get("intent")
-                if not intent:
-                    continue
-
-                pattern = cmd.get("pattern")
-                if not pattern:
-                    # Auto-generate pattern from intent name
-                    pattern = self._generate_pattern_from_intent(intent)
-
-                patterns.append((pattern, intent))
-
+            patterns = self.patterns_from_settings(settings)
             logger.info(f"✓ Loaded {len(patterns)} command patterns from settings")
             return patterns
 
@@ -186,6 +1068,57 @@ class ArtilleryCommandProcessor:
             logger.error(f"Error loading settings: {e}, using defaults")
             return self._get_default_patterns()
 
+    def patterns_from_settings(self, settings: dict) -> list:
+        """
+        Build (pattern, intent) tuples from the "commands" of parsed settings
+
+        Raises:
+            TypeError, AttributeError: "commands" is not a list of objects
+        """
+        patterns = []
+        for cmd in settings.get("commands", []):
+            intent = cmd.get("intent")
+            if not intent:
+                continue
+
+            pattern = cmd.get("pattern")
+            if not pattern:
+                # Auto-generate pattern from intent name
+                pattern = self._generate_pattern_from_intent(intent)
+
+            patterns.append((pattern, intent))
+        return patterns
+
+    @staticmethod
+    def compile_matchers(patterns: list, settings: dict = None) -> tuple:
+        """
+        Compile the exact matcher and, if enabled, the fuzzy fallback index
+
+        Args:
+            patterns: List of (pattern, intent) tuples
+            settings: Parsed settings to read "fuzzy_match" from (default: Config)
+
+        Returns:
+            Tuple of (IntentMatcher, FuzzyIntentIndex or None)
+        """
+        fuzzy = Config.get_fuzzy_settings(settings)
+        fuzzy_index = FuzzyIntentIndex(patterns, fuzzy["threshold"]) if fuzzy["enabled"] else None
+        return IntentMatcher(patterns), fuzzy_index
+
+    def swap_patterns(self, patterns: list, matchers: tuple = None) -> None:
+        """
+        Replace the command patterns while commands are being processed
+
+        Each command reads the matchers once, so it sees either the old or
+        the new patterns, never a mix.
+
+        Args:
+            patterns: List of (pattern, intent) tuples
+            matchers: Result of compile_matchers(patterns) (compiled if omitted)
+        """
+        self._matchers = matchers or self.compile_matchers(patterns)
+        self.INTENT_PATTERNS = patterns
+
     def _generate_pattern_from_intent(self, intent: str) -> str:
         """
         Auto-generate regex pattern from intent name
@@ -246,7 +1179,8 @@ class ArtilleryCommandProcessor:
             text: Voice command text
 
         Returns:
-            Dictionary with raw, status_code, reason_phrase, intent, x, y coordinates
+            Dictionary with raw, status_code, reason_phrase, intent,
+            match_score, x, y coordinates
         """
         text = text.strip()
 
@@ -254,27 +1188,164 @@ class ArtilleryCommandProcessor:
         normalized_text = self._convert_words_to_digits(text)
 
         # Detect intent from command
-        intent = self._detect_intent(normalized_text)
+        intent, match_score = self._match_intent(normalized_text)
 
         # Extract grid coordinates
         coords = self._extract_and_convert_grid(normalized_text)
 
-        # Determine status code and reason phrase
-        if intent is None:
-            status_code = 400
-            reason_phrase = "Bad Request - Invalid command intent"
-        elif coords is None or coords["x"] is None or coords["y"] is None:
-            status_code = 400
-            reason_phrase = "Bad Request - Invalid or missing grid coordinates"
-        else:
-            status_code = 200
-            reason_phrase = "OK"
+        return self._build_command(text, intent, match_score, coords)
 
-        return {
+    def process_all(self, text: str) -> list:
+        """
+        Process an utterance that may call several commands
+
+        Commands are separated by "then", e.g. "mortar shell grid 12 34
+        keypad 7 then smoke barrage grid 56 78". The text is normalized and
+        tokenized once, then each part is matched and parsed on its own. A
+        part without an intent of its own completes a neighbouring command
+        that lacks its grid: the one before it ("mortar shell then grid 12
+        34"), else the one after it ("grid 12 34 then mortar shell"). A part
+        with neither an intent nor a grid always joins a neighbour, so the
+        text is only split where every command has an intent or a grid of
+        its own. A grid nothing claims comes out as its own 400 command (an
+        unrecognized fire mission) instead of being dropped.
+
+        Args:
+            text: Voice command text
+
+        Returns:
+            List of command dicts as returned by process(), in spoken order.
+            When there are several, each also has batch_index and batch_size.
+        """
+        text = text.strip()
+        normalized_text = self._convert_words_to_digits(text)
+        tokens = self.TOKEN_PATTERN.findall(normalized_text.lower())
+
+        parts = [[]]
+        for token in tokens:
+            if token in self.COMMAND_SEPARATORS:
+                parts.append([])
+            else:
+                parts[-1].append(token)
+
+        # Each group is [tokens, intent, score, heard, has_grid]
+        groups = []
+        parts = [part for part in parts if part]
+        if len(parts) > 1:
+            found = [
+                [part, *self._find_intent(" ".join(part)), self._parse_grid(part) is not None]
+                for part in parts
+            ]
+            pending = []  # Tokens waiting to join the next command
+            for index, (part, intent, score, heard, has_grid) in enumerate(found):
+                if intent is not None:
+                    groups.append([pending + part, intent, score, heard, has_grid or bool(pending)])
+                    pending = []
+                elif groups and not (has_grid and groups[-1][4]):
+                    # Completes the previous command ("... then grid 12 34", "... then out")
+                    groups[-1][0].extend(part)
+                    groups[-1][4] = groups[-1][4] or has_grid
+                elif not has_grid or (
+                    index + 1 < len(found) and found[index + 1][1] is not None and not found[index + 1][4]
+                ):
+                    # Leads into the next command ("grid 12 34 then mortar shell", "target then ...")
+                    pending.extend(part)
+                else:
+                    groups.append([part, None, None, None, True])
+            if pending:
+                if groups:
+                    groups[-1][0].extend(pending)
+                else:
+                    groups.append([pending, None, None, None, True])
+
+        if len(groups) <= 1:
+            # A single command: parsed exactly like process()
+            intent, match_score = self._match_intent(normalized_text)
+            coords = self._grid_from_tokens(tokens)
+            return [self._build_command(text, intent, match_score, coords)]
+
+        commands = []
+        for index, (part, intent, score, heard, _) in enumerate(groups):
+            self._log_intent(intent, score, heard)
+            command = self._build_command(text, intent, score, self._grid_from_tokens(part))
+            command["batch_index"] = index
+            command["batch_size"] = len(groups)
+            commands.append(command)
+        command_logger.info("✓ Utterance holds %d commands", len(commands))
+        return commands
+
+    def command_signature(self, text: str) -> Optional[tuple]:
+        """
+        Check, without logging, whether text already holds a complete command
+
+        Meant for partial transcriptions of an utterance still being spoken.
+        The signature changes whenever anything that affects the output
+        does, so it can be compared between partials.
+
+        Args:
+            text: Voice command text, possibly cut off mid-sentence
+
+        Returns:
+            Tuple of (intent, easting, northing, keypad) per command, or
+            None unless the last command has an intent and a grid and does
+            not end in a keypad word still waiting for its digit
+        """
+        normalized_text = self._convert_words_to_digits(text.strip(), log=False)
+        tokens = self.TOKEN_PATTERN.findall(normalized_text.lower())
+        # A keypad word or separator at the end means more is coming
+        if not tokens or tokens[-1] in ("keypad", "key", "pad", *self.COMMAND_SEPARATORS):
+            return None
+
+        parts = [[]]
+        for token in tokens:
+            if token in self.COMMAND_SEPARATORS:
+                parts.append([])
+            else:
+                parts[-1].append(token)
+
+        signature = []
+        for part in parts:
+            intent, _, _ = self._find_intent(" ".join(part))
+            grid = self._parse_grid(part)
+            if grid is None:
+                signature.append((intent, None, None, None))
+            else:
+                signature.append((intent, grid["easting"], grid["northing"], grid["keypad"]))
+        if signature[-1][0] is None or signature[-1][1] is None:
+            return None
+        return tuple(signature)
+
+    def _build_command(self, text: str, intent: Optional[str], match_score, coords: Optional[dict]) -> dict:
+        """
+        Assemble the command dict with its status code
+
+        Args:
+            text: Original command text
+            intent: Detected intent, or None
+            match_score: Score from _match_intent
+            coords: Dict with x and y, or None
+
+        Returns:
+            Dictionary with raw, status_code, reason_phrase, intent,
+            match_score, x, y coordinates
+        """
+        # Determine status code and reason phrase
+        if intent is None:
+            status_code = 400
+            reason_phrase = "Bad Request - Invalid command intent"
+        elif coords is None or coords["x"] is None or coords["y"] is None:
+            status_code = 400
+            reason_phrase = "Bad Request - Invalid or missing grid coordinates"
+        else:
+            status_code = 200
+            reason_phrase = "OK"
+
+        return {
             "raw": text,
             "status_code": status_code,
             "reason_phrase": reason_phrase,
             "intent": intent,
+            "match_score": match_score,
             "x": coords["x"] if coords else None,
             "y": coords["y"] if coords else None,
         }
@@ -289,37 +1360,129 @@ class ArtilleryCommandProcessor:
         Returns:
             Intent string (e.g., "call_mortar_shell") or None if not found
         """
-        text_lower = text.lower()
+        return self._match_intent(text)[0]
+
+    def _match_intent(self, text: str) -> tuple:
+        """
+        Detect intent, falling back to the fuzzy index for near misses
 
-        for pattern, intent in self.INTENT_PATTERNS:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                logger.info(f"✓ Intent detected: {intent}")
-                return intent
+        Args:
+            text: Normalized command text
 
-        # No intent matched
-        logger.warning("No matching intent found in command")
-        return None
+        Returns:
+            Tuple of (intent, match score): score is 1.0 for an exact pattern
+            match, the fuzzy similarity for a near miss, None without intent
+        """
+        intent, score, heard = self._find_intent(text)
+        self._log_intent(intent, score, heard)
+        return intent, score
+
+    def _find_intent(self, text: str) -> tuple:
+        """
+        Exact then fuzzy intent lookup, without logging
+
+        Returns:
+            Tuple of (intent, match score, heard): heard is the phrase a
+            fuzzy match was made on (None for exact or no match)
+        """
+        matcher, fuzzy_index = self._matchers
+        text = text.lower()
+        intent = matcher.match(text)
+        if intent:
+            return intent, 1.0, None
+
+        if fuzzy_index is not None:
+            near_miss = fuzzy_index.match(text)
+            if near_miss:
+                return near_miss
+
+        return None, None, None
+
+    @staticmethod
+    def _log_intent(intent: Optional[str], score, heard: Optional[str]) -> None:
+        """Log the result of _find_intent"""
+        if intent is None:
+            command_logger.warning("No matching intent found in command")
+        elif heard is None:
+            command_logger.info("✓ Intent detected: %s", intent)
+        else:
+            command_logger.info(
+                "✓ Intent detected (fuzzy): %s, heard '%s', score %.2f", intent, heard, score
+            )
 
-    def _convert_words_to_digits(self, text: str) -> str:
+    def _convert_words_to_digits(self, text: str, log: bool = True) -> str:
         """
-        Convert spoken number words to digits
+        Convert spoken number words to digits in a single pass
+
+        Handles homophones ("tree", "fife", "niner"), repeated digits
+        ("double five" -> "5 5") and punctuation between digits that
+        Whisper adds ("one, two" -> "1 2").
 
         Args:
             text: Original text with potential number words
+            log: Log the conversion
 
         Returns:
             Text with number words replaced by digits
         """
-        result = text.lower()
+        words = []
+        last_was_digit = False
+        pending_punct = ""  # Punctuation held until the next token is known
+        repeat_word = ""  # "double"/"triple" held until the next token is known
+
+        for token in self.TOKEN_PATTERN.findall(text.lower()):
+            digit = self._digit_words.get(token)
+            if digit is None and token.isdigit():
+                digit = token
+
+            if digit is not None:
+                # Punctuation next to a digit is only a separator
+                pending_punct = ""
+                if repeat_word:
+                    if len(digit) == 1:
+                        words.extend([digit] * self.REPEAT_WORDS[repeat_word])
+                    else:
+                        words.extend([repeat_word, digit])
+                    repeat_word = ""
+                else:
+                    words.append(digit)
+                last_was_digit = True
+                continue
 
-        # Replace number words with digits
-        for word, digit in self.WORD_TO_DIGIT.items():
-            # Use word boundaries to avoid partial matches
-            result = re.sub(r"\b" + word + r"\b", digit, result, flags=re.IGNORECASE)
+            if repeat_word:
+                words.append(repeat_word)
+                repeat_word = ""
 
-        logger.info(f"✓ Converted words to digits: '{text}' -> '{result}'")
+            if token[0].isalpha():
+                if pending_punct:
+                    self._attach_punctuation(words, pending_punct)
+                    pending_punct = ""
+                if token in self.REPEAT_WORDS:
+                    repeat_word = token
+                else:
+                    words.append(token)
+                last_was_digit = False
+            elif not last_was_digit:
+                pending_punct += token
+
+        if repeat_word:
+            words.append(repeat_word)
+        if pending_punct:
+            self._attach_punctuation(words, pending_punct)
+
+        result = " ".join(words)
+        if log:
+            command_logger.info("✓ Converted words to digits: '%s' -> '%s'", text, result)
         return result
 
+    @staticmethod
+    def _attach_punctuation(words: list, punct: str) -> None:
+        """Glue punctuation onto the preceding word, as it appeared in the text"""
+        if words:
+            words[-1] += punct
+        else:
+            words.append(punct)
+
     def _extract_and_convert_grid(self, text: str) -> Optional[dict]:
         """
         Extract MGRS grid coordinates and convert to meter precision format
@@ -339,70 +1502,151 @@ class ArtilleryCommandProcessor:
         Returns:
             Dict with x and y coordinates in meter format with 1 decimal, or None if not found
         """
-        # Normalize comma-separated digits
-        comma_pattern = r"(?:grid|Grid)\s+(.+?)(?:keypad|$)"
-        comma_match = re.search(comma_pattern, text, re.IGNORECASE)
-
-        if comma_match:
-            grid_text = comma_match.group(1).strip()
-            digits = re.findall(r"\b(\d)\b", grid_text)
-            if len(digits) >= 4:
-                digit_string = "".join(digits[:10])  # Take up to 10 digits
-                # Replace in text for further processing
-                text = text.replace(grid_text, digit_string)
-                logger.info(f"✓ Normalized comma-separated digits: {digit_string}")
-
-        # Find coordinate patterns (2x2, 3x3, 4x4, or 5x5)
-        coord_patterns = [
-            (r"\b(\d{5})\s*(\d{5})\b", 5),  # 5x5 (10 digits)
-            (r"\b(\d{4})\s*(\d{4})\b", 4),  # 4x4 (8 digits)
-            (r"\b(\d{3})\s*(\d{3})\b", 3),  # 3x3 (6 digits)
-            (r"\b(\d{2})\s*(\d{2})\b", 2),  # 2x2 (4 digits)
-        ]
+        return self._grid_from_tokens(self.TOKEN_PATTERN.findall(text.lower()))
 
-        easting = None
-        northing = None
-        precision = 0
+    def _grid_from_tokens(self, tokens: list) -> Optional[dict]:
+        """
+        Parse and convert the grid of already tokenized command text
 
-        for pattern, prec in coord_patterns:
-            match = re.search(pattern, text)
-            if match:
-                easting = match.group(1)
-                northing = match.group(2)
-                precision = prec
-                break
+        Args:
+            tokens: Tokens from TOKEN_PATTERN over lowercased, normalized text
 
-        if not easting or not northing:
-            logger.warning("No grid coordinates found in command")
+        Returns:
+            Dict with x and y coordinates, or None if not found
+        """
+        grid = self._parse_grid(tokens)
+
+        if grid is None:
+            command_logger.warning("No grid coordinates found in command")
             return None
 
-        # Check for keypad modifier
-        keypad_match = re.search(r"\bkeypad\s+(\d)\b", text.lower())
+        precision = grid["precision"]
+        keypad = grid["keypad"]
+        if command_logger.isEnabledFor(logging.INFO):
+            consumed = " ".join(tokens[index] for index in grid["consumed"])
+            command_logger.info("✓ Grid tokens consumed: '%s'", consumed)
 
         # Convert to meter precision format
         x_coord, y_coord = self._normalize_to_5digit_format(
-            easting, northing, precision, keypad_match
+            grid["easting"], grid["northing"], precision, keypad
         )
 
         # Log the conversion
-        if keypad_match:
-            keypad = int(keypad_match.group(1))
-            precision_map = {2: "1km", 3: "100m", 4: "10m", 5: "1m"}
-            prec_str = precision_map.get(precision, "unknown")
-            logger.info(
-                f"✓ {precision}x{precision} ({prec_str}) + keypad {keypad} -> x={x_coord}, y={y_coord}"
-            )
-        else:
-            precision_map = {2: "1km", 3: "100m", 4: "10m", 5: "1m"}
-            prec_str = precision_map.get(precision, "unknown")
-            logger.info(
-                f"✓ {precision}x{precision} ({prec_str}) + keypad 5 (center) -> x={x_coord}, y={y_coord}"
-            )
+        precision_map = {2: "1km", 3: "100m", 4: "10m", 5: "1m"}
+        prec_str = precision_map.get(precision, "unknown")
+        command_logger.info(
+            "✓ %dx%d (%s) + keypad %s -> x=%s, y=%s",
+            precision,
+            precision,
+            prec_str,
+            keypad if keypad is not None else "5 (center)",
+            x_coord,
+            y_coord,
+        )
 
         return {"x": x_coord, "y": y_coord}
 
+    def _parse_grid(self, tokens: list) -> Optional[dict]:
+        """
+        Parse grid digits and keypad from normalized tokens in a single pass
+
+        Consecutive digit tokens form a run ("1 2 3 4", "12 34", "1234").
+        A run is a grid when it holds an even number of digits from 4 to 10
+        (only the first 10 are used), split evenly into easting and northing.
+        An odd-length run only keeps its grid when it ends in a stray
+        single-digit token after digit groups that still split evenly
+        between tokens ("grid 12 34 5"); the stray digit is left out.
+        Anything else ("grid 123 45", "grid 1 2 3 4 5") is misheard and not
+        a grid.
+        The run right after "grid" wins; otherwise the first valid run does.
+        "keypad N" (or "key pad N") sets the keypad and is never read as
+        part of the grid.
+
+        Args:
+            tokens: Tokens from TOKEN_PATTERN over lowercased, normalized text
+
+        Returns:
+            Dict with easting, northing, precision (digits per axis), keypad
+            (int or None) and consumed (indices of the tokens used), or None
+        """
+        grid_run = None
+        first_run = None
+        keypad = None
+        keypad_indices = []
+
+        run_digits = ""
+        run_indices = []
+        run_starts = []  # Offset in run_digits of each token in run_indices
+        run_after_grid = False
+        after_grid = False
+        keypad_word = None  # Index of a keypad word awaiting its digit
+
+        for index, token in enumerate(tokens + [""]):  # "" closes the last run
+            if token.isdigit():
+                if keypad_word is not None:
+                    if keypad is None and len(token) == 1:
+                        keypad = int(token)
+                        keypad_indices = [keypad_word, index]
+                    keypad_word = None
+                    continue
+                if not run_indices:
+                    run_after_grid = after_grid
+                if len(run_digits) < 10:
+                    run_indices.append(index)
+                    run_starts.append(len(run_digits))
+                run_digits += token
+                continue
+
+            if token and not token[0].isalpha() and run_indices:
+                continue  # Stray punctuation inside a run is a separator
+
+            # Any other token ends the current run
+            if run_indices:
+                digits = run_digits[:10]
+                used = run_indices
+                if len(digits) % 2:
+                    digits, used = digits[: run_starts[-1]], run_indices[:-1]
+                    lengths = [end - start for start, end in zip(run_starts, run_starts[1:])]
+                    if not (
+                        len(run_digits) - run_starts[-1] == 1
+                        and all(length > 1 for length in lengths)
+                        and len(digits) // 2 in run_starts
+                    ):
+                        digits = ""
+                if len(digits) >= 4 and len(digits) % 2 == 0:
+                    run = (digits, used)
+                    if run_after_grid and grid_run is None:
+                        grid_run = run
+                    if first_run is None:
+                        first_run = run
+                run_digits = ""
+                run_indices = []
+                run_starts = []
+
+            if token == "keypad":
+                keypad_word = index
+            elif token == "pad" and index and tokens[index - 1] == "key":
+                keypad_word = index - 1
+            else:
+                keypad_word = None
+            after_grid = token == "grid"
+
+        run = grid_run or first_run
+        if run is None:
+            return None
+
+        digits, indices = run
+        precision = len(digits) // 2
+        return {
+            "easting": digits[:precision],
+            "northing": digits[precision:],
+            "precision": precision,
+            "keypad": keypad,
+            "consumed": sorted(indices + keypad_indices),
+        }
+
     def _normalize_to_5digit_format(
-        self, easting: str, northing: str, precision: int, keypad_match
+        self, easting: str, northing: str, precision: int, keypad: Optional[int]
     ) -> tuple:
         """
         Convert MGRS coordinates to meter precision format (5 digits + 1 decimal)
@@ -425,22 +1669,22 @@ class ArtilleryCommandProcessor:
             easting: Easting coordinate string (2-5 digits)
             northing: Northing coordinate string (2-5 digits)
             precision: Number of digits per coordinate (2-5)
-            keypad_match: Regex match object for keypad number, or None
+            keypad: Spoken keypad number, or None
 
         Returns:
             Tuple of (x_coord, y_coord) as floats rounded to 1 decimal place
         """
         # Default to keypad 5 (center) if no keypad specified
-        if keypad_match:
-            keypad = int(keypad_match.group(1))
+        keypad_specified = keypad is not None
+        if keypad_specified:
             if keypad not in Config.KEYPAD_OFFSETS:
-                logger.error(
-                    f"Invalid keypad number: {keypad} (must be 1-9), using center"
+                command_logger.error(
+                    "Invalid keypad number: %s (must be 1-9), using center", keypad
                 )
                 keypad = 5
         else:
             keypad = 5
-            logger.info(f"  → No keypad specified, defaulting to keypad 5 (center)")
+            command_logger.info("  → No keypad specified, defaulting to keypad 5 (center)")
 
         # Get keypad offsets (normalized 0.0-1.0)
         offset_e, offset_n = Config.KEYPAD_OFFSETS[keypad]
@@ -477,10 +1721,10 @@ class ArtilleryCommandProcessor:
         x_coord = round(final_e, 1)
         y_coord = round(final_n, 1)
 
-        if keypad_match:
-            logger.info(f"  → Keypad {keypad} positioning: {x_coord}, {y_coord}")
+        if keypad_specified:
+            command_logger.info("  → Keypad %d positioning: %s, %s", keypad, x_coord, y_coord)
         else:
-            logger.info(f"  → Centered (keypad 5): {x_coord}, {y_coord}")
+            command_logger.info("  → Centered (keypad 5): %s, %s", x_coord, y_coord)
 
         return x_coord, y_coord
 
@@ -500,42 +1744,1763 @@ class OutputHandler:
 
             with open(self.output_path, "w", encoding="utf-8") as f:
                 json.dump(command, f, indent=2, ensure_ascii=False)
-            logger.info(f"✓ Command saved to {self.output_path}")
+            command_logger.info("✓ Command saved to %s", self.output_path)
+        except Exception as e:
+            logger.error("Failed to save command: %s", e)
+
+    def save_batch(self, commands: list) -> None:
+        """Save the commands of one multi-command utterance in a single write"""
+        try:
+            now = int(time.time())
+            for command in commands:
+                command["timestamp"] = now
+
+            with open(self.output_path, "w", encoding="utf-8") as f:
+                json.dump(self.batch_document(commands), f, indent=2, ensure_ascii=False)
+            command_logger.info("✓ %d commands saved to %s", len(commands), self.output_path)
+        except Exception as e:
+            logger.error("Failed to save commands: %s", e)
+
+    @staticmethod
+    def batch_document(commands: list) -> dict:
+        """
+        Latest-command file content for a batch
+
+        The first command stays at the top level, so readers that expect a
+        single command still get one; "batch" lists every command in order.
+        """
+        return {**commands[0], "batch": commands}
+
+    def close(self) -> None:
+        """Release any open files"""
+        pass
+
+
+class JournalOutputHandler(OutputHandler):
+    """
+    Publishes the latest command atomically and journals every command
+
+    The latest command is written to a temp file and renamed over the output
+    file, so a reader never sees a half-written file. Every command is also
+    appended, with a monotonic "seq" number, to a size-capped rotating JSONL
+    journal, so a reader can tail it from its last sequence number and never
+    miss or re-read a command. Rotated files are named journal.1, journal.2, ...
+    """
+
+    # Attempts to replace the output file while a reader has it open (Windows)
+    REPLACE_RETRIES = 5
+    REPLACE_RETRY_DELAY = 0.01
+
+    def __init__(self, output_file: str, journal_file: str, max_bytes: int, backups: int):
+        super().__init__(output_file)
+        self.journal_path = Path(journal_file)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._temp_path = self.output_path.with_name(self.output_path.name + ".tmp")
+        self._sequence = self._read_last_sequence()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def save_command(self, command: dict) -> None:
+        """Append command to the journal and publish it as the latest command"""
+        try:
+            # Add Unix timestamp and sequence number
+            command["timestamp"] = int(time.time())
+            self._sequence += 1
+            command["seq"] = self._sequence
+
+            self._append_to_journal(json.dumps(command, ensure_ascii=False) + "\n")
+            self._publish_latest(command)
+            command_logger.info("✓ Command #%d saved to %s", self._sequence, self.output_path)
+        except Exception as e:
+            logger.error("Failed to save command: %s", e)
+
+    def save_batch(self, commands: list) -> None:
+        """Journal each command with its own sequence number, then publish the batch"""
+        try:
+            now = int(time.time())
+            lines = []
+            for command in commands:
+                command["timestamp"] = now
+                self._sequence += 1
+                command["seq"] = self._sequence
+                lines.append(json.dumps(command, ensure_ascii=False) + "\n")
+
+            self._append_to_journal("".join(lines))
+            self._publish_latest(self.batch_document(commands))
+            command_logger.info(
+                "✓ Commands #%d-#%d saved to %s",
+                commands[0]["seq"],
+                self._sequence,
+                self.output_path,
+            )
         except Exception as e:
-            logger.error(f"Failed to save command: {e}")
+            logger.error("Failed to save commands: %s", e)
+
+    def close(self) -> None:
+        """Close the journal file"""
+        self._journal.close()
+
+    def _append_to_journal(self, line: str) -> None:
+        """Append one JSONL line, rotating first if it would exceed max_bytes"""
+        if self.max_bytes > 0:
+            size = self._journal.tell()
+            if size > 0 and size + len(line.encode("utf-8")) > self.max_bytes:
+                self._rotate()
+
+        self._journal.write(line)
+        self._journal.flush()
+
+    def _rotate(self) -> None:
+        """Shift journal -> journal.1 -> journal.2 ..., dropping the oldest"""
+        self._journal.close()
+        try:
+            if self.backups > 0:
+                for index in range(self.backups - 1, 0, -1):
+                    source = self._backup_path(index)
+                    if source.exists():
+                        os.replace(source, self._backup_path(index + 1))
+                os.replace(self.journal_path, self._backup_path(1))
+            else:
+                self.journal_path.unlink()
+        except OSError as e:
+            # A reader holding the file open can block the rename on Windows
+            logger.warning(f"Journal rotation failed, appending past the size cap: {e}")
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _backup_path(self, index: int) -> Path:
+        """Path of the index-th rotated journal file"""
+        return self.journal_path.with_name(f"{self.journal_path.name}.{index}")
+
+    def _publish_latest(self, command: dict) -> None:
+        """Write the latest command via temp file + rename"""
+        with open(self._temp_path, "w", encoding="utf-8") as f:
+            json.dump(command, f, indent=2, ensure_ascii=False)
+
+        for attempt in range(self.REPLACE_RETRIES):
+            try:
+                os.replace(self._temp_path, self.output_path)
+                return
+            except PermissionError:
+                if attempt == self.REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(self.REPLACE_RETRY_DELAY)
+
+    def _read_last_sequence(self) -> int:
+        """Recover the last sequence number from the journal so it stays monotonic"""
+        for path in (self.journal_path, self._backup_path(1)):
+            try:
+                with open(path, "rb") as f:
+                    f.seek(0, os.SEEK_END)
+                    f.seek(max(0, f.tell() - 64 * 1024))
+                    lines = f.read().splitlines()
+            except OSError:
+                continue
+
+            for line in reversed(lines):
+                try:
+                    return int(json.loads(line)["seq"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return 0
+
+
+class MultiOutputHandler:
+    """Sends each command to several output handlers, in order"""
+
+    def __init__(self, handlers: list):
+        self.handlers = handlers
+
+    def save_command(self, command: dict) -> None:
+        """Save command with every handler"""
+        for handler in self.handlers:
+            handler.save_command(command)
+
+    def save_batch(self, commands: list) -> None:
+        """Save the commands of one utterance with every handler"""
+        for handler in self.handlers:
+            save_batch = getattr(handler, "save_batch", None)
+            if save_batch is not None:
+                save_batch(commands)
+            else:
+                for command in commands:
+                    handler.save_command(command)
+
+    def set_intents(self, intents: list) -> None:
+        """Pass a changed intent list to the handlers that number intents"""
+        for handler in self.handlers:
+            if hasattr(handler, "set_intents"):
+                handler.set_intents(intents)
+
+    def close(self) -> None:
+        """Close every handler"""
+        for handler in self.handlers:
+            handler.close()
+
+
+def create_output_handler(output_path: str, intents: list = ()):
+    """
+    Create the output handler(s) selected by "output_mode" in settings.json
+
+    "output_mode" is one mode or a list of modes, e.g. ["socket", "journal"].
+    A backend that fails to start is skipped; if none start, the plain file
+    output is used.
+
+    Args:
+        output_path: Path of the latest-command JSON file
+        intents: Intent names in settings order, used as ids by "shm"
+
+    Returns:
+        Output handler with save_command(), save_batch() and close()
+    """
+    handlers = []
+    for mode in Config.get_output_modes():
+        try:
+            if mode == "file":
+                handlers.append(OutputHandler(output_path))
+            elif mode == "journal":
+                journal = Config.get_journal_settings()
+                journal_path = Path(output_path).with_name(Config.JOURNAL_FILE)
+                logger.info(f"Journal file: '{journal_path}'")
+                handlers.append(
+                    JournalOutputHandler(
+                        output_path, str(journal_path), journal["max_bytes"], journal["backups"]
+                    )
+                )
+            elif mode == "socket":
+                from socket_output import SocketOutputHandler
+
+                handlers.append(SocketOutputHandler(**Config.get_socket_settings()))
+            elif mode == "shm":
+                from shm_output import SharedMemoryOutputHandler
+
+                handlers.append(
+                    SharedMemoryOutputHandler(
+                        str(Path(output_path).with_name(Config.SHM_FILE)),
+                        str(Path(output_path).with_name(Config.SHM_MANIFEST_FILE)),
+                        list(intents),
+                    )
+                )
+            else:
+                logger.warning(f"Unknown output_mode '{mode}', ignoring")
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Failed to start '{mode}' output: {e}")
+
+    if not handlers:
+        logger.warning("No output started, falling back to 'file'")
+        return OutputHandler(output_path)
+    if len(handlers) == 1:
+        return handlers[0]
+    return MultiOutputHandler(handlers)
+
+
+# ====== Latency Tracing ======
+class LatencyTracer:
+    """
+    Traces each utterance from wake word to saved command
+
+    Every utterance gets a trace: a dict with a trace_id and the
+    perf_counter time of each event. Recorder callbacks mark the audio
+    events, the pipeline marks parsing and saving. Completed traces feed a
+    rolling window per stage, whose p50/p95/p99 are rewritten to a metrics
+    file (Prometheus text format or JSON) after every command.
+    """
+
+    # Stage name -> (start event, end event)
+    STAGES = {
+        "wake_word": ("wakeword", "recording_start"),  # Wake word until speech starts
+        "recording": ("recording_start", "recording_stop"),  # Speech plus end-of-speech silence
+        "transcription_wait": ("recording_stop", "transcription_start"),
+        "decode": ("transcription_start", "transcribed"),
+        "queue": ("transcribed", "parse_start"),
+        "parse": ("parse_start", "parse_end"),
+        "output_queue": ("parse_end", "save_start"),
+        "save": ("save_start", "save_end"),
+        "end_to_end": ("recording_stop", "save_end"),  # What the speaker waits for
+    }
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, metrics_file: str = None, metrics_format: str = "prometheus", window: int = 500):
+        """
+        Set up empty stage windows
+
+        Args:
+            metrics_file: File to write stage percentiles to (None: don't write)
+            metrics_format: "prometheus" or "json"
+            window: Number of recent utterances the percentiles cover
+        """
+        self.metrics_path = Path(metrics_file) if metrics_file else None
+        self.metrics_format = metrics_format
+        self.window = window
+        self._lock = threading.Lock()
+        self._current = None
+        self._windows = {stage: deque(maxlen=window) for stage in self.STAGES}
+        self._counts = dict.fromkeys(self.STAGES, 0)
+        self._sums = dict.fromkeys(self.STAGES, 0.0)
+        self._last_trace_id = None
+
+    @staticmethod
+    def new_trace() -> dict:
+        """Start an empty trace"""
+        return {"trace_id": uuid.uuid4().hex, "events": {}}
+
+    @staticmethod
+    def mark(trace: Optional[dict], event: str) -> None:
+        """Record the time of event in trace (no-op without a trace)"""
+        if trace is not None:
+            trace["events"][event] = time.perf_counter()
+
+    def recorder_callbacks(self) -> dict:
+        """AudioToTextRecorder callbacks that mark the audio events"""
+        return {
+            "on_wakeword_detected": self._on_wakeword_detected,
+            "on_recording_start": self._on_recording_start,
+            "on_recording_stop": lambda: self._mark_current("recording_stop"),
+            "on_transcription_start": lambda audio: self._mark_current("transcription_start"),
+        }
+
+    def take(self) -> dict:
+        """
+        Detach the trace of the utterance the recorder just transcribed
+
+        Returns:
+            The trace, marked "transcribed" (a fresh one if no callback fired)
+        """
+        with self._lock:
+            trace = self._current or self.new_trace()
+            self._current = None
+        self.mark(trace, "transcribed")
+        return trace
+
+    def complete(self, trace: dict) -> dict:
+        """
+        Add a finished trace to the rolling windows and rewrite the metrics file
+
+        Returns:
+            Stage durations of this trace in milliseconds
+        """
+        events = trace["events"]
+        durations = {}
+        for stage, (start, end) in self.STAGES.items():
+            if start in events and end in events:
+                durations[stage] = (events[end] - events[start]) * 1000
+
+        with self._lock:
+            for stage, milliseconds in durations.items():
+                self._windows[stage].append(milliseconds)
+                self._counts[stage] += 1
+                self._sums[stage] += milliseconds
+            self._last_trace_id = trace["trace_id"]
+            snapshot = self.snapshot()
+
+        if self.metrics_path is not None:
+            self._write_metrics(snapshot)
+        return durations
+
+    def snapshot(self) -> dict:
+        """Count and rolling p50/p95/p99 (ms) per stage"""
+        stages = {}
+        for stage, window in self._windows.items():
+            if not window:
+                continue
+            ordered = sorted(window)
+            stages[stage] = {
+                "count": self._counts[stage],
+                "sum_ms": round(self._sums[stage], 3),
+                **{
+                    f"p{round(q * 100)}_ms": round(self._percentile(ordered, q), 3)
+                    for q in self.QUANTILES
+                },
+            }
+        return {"window": self.window, "last_trace_id": self._last_trace_id, "stages": stages}
+
+    def _on_wakeword_detected(self) -> None:
+        """A wake word always begins a new utterance"""
+        trace = self.new_trace()
+        self.mark(trace, "wakeword")
+        with self._lock:
+            self._current = trace
+
+    def _on_recording_start(self) -> None:
+        """Recording begins a new utterance unless the wake word already did"""
+        with self._lock:
+            if self._current is None or "recording_start" in self._current["events"]:
+                self._current = self.new_trace()
+            self.mark(self._current, "recording_start")
+
+    def _mark_current(self, event: str) -> None:
+        """Mark event on the utterance in progress"""
+        with self._lock:
+            self.mark(self._current, event)
+
+    @staticmethod
+    def _percentile(sorted_values: list, fraction: float) -> float:
+        """Nearest-rank percentile of an already sorted list"""
+        index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+        return sorted_values[index]
+
+    def _write_metrics(self, snapshot: dict) -> None:
+        """Replace the metrics file with the current percentiles"""
+        if self.metrics_format == "json":
+            content = json.dumps({"updated": time.time(), **snapshot}, indent=2)
+        else:
+            content = self._to_prometheus(snapshot)
+
+        temp_path = self.metrics_path.with_name(self.metrics_path.name + ".tmp")
+        try:
+            temp_path.write_text(content, encoding="utf-8")
+            os.replace(temp_path, self.metrics_path)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics: {e}")
+
+    def _to_prometheus(self, snapshot: dict) -> str:
+        """Render stage percentiles as a Prometheus summary"""
+        name = "vox_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Per-utterance latency by stage over the last {snapshot['window']} utterances",
+            f"# TYPE {name} summary",
+        ]
+        for stage, stats in snapshot["stages"].items():
+            for q in self.QUANTILES:
+                seconds = stats[f"p{round(q * 100)}_ms"] / 1000
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {seconds:.6f}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats["sum_ms"] / 1000:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+# ====== Command Pipeline ======
+class CommandPipeline:
+    """
+    Parses and outputs transcriptions on worker threads
+
+    The recognition loop only hands each transcription to submit() and goes
+    straight back to recorder.text(). A parser thread turns transcriptions
+    into commands (several for a "... then ..." utterance) and an output
+    thread saves and logs them, emitting the commands of one utterance as
+    a single batch. Each stage is a
+    single thread fed by a bounded FIFO queue, so commands come out in the
+    order they were spoken, and a full queue makes submit() wait
+    (backpressure) instead of dropping commands.
+    """
+
+    QUEUE_SIZE = 8
+
+    # Sentinel passed down the queues to stop the workers after draining
+    _STOP = object()
+
+    def __init__(
+        self, processor, output_handler, queue_size: int = QUEUE_SIZE, tracer=None, quiet: bool = False
+    ):
+        self.processor = processor
+        self.output_handler = output_handler
+        self.tracer = tracer
+        self.quiet = quiet
+        self._transcripts = queue.Queue(maxsize=queue_size)
+        self._commands = queue.Queue(maxsize=queue_size)
+        self._aborted = threading.Event()  # Set when stop() gives up on draining
+        self._parser = threading.Thread(
+            target=self._parse_loop, name="command-parser", daemon=True
+        )
+        self._writer = threading.Thread(
+            target=self._output_loop, name="command-output", daemon=True
+        )
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        self._parser.start()
+        self._writer.start()
+
+    def try_submit(self, text: str, trace: dict = None) -> bool:
+        """
+        Queue a transcription without waiting
+
+        Returns:
+            False if the pipeline is backed up and the transcription was not queued
+        """
+        try:
+            self._transcripts.put_nowait((text, trace))
+        except queue.Full:
+            return False
+        return True
+
+    def submit(self, text: str, trace: dict = None) -> None:
+        """
+        Queue a transcription; waits only if the pipeline is backed up
+
+        Args:
+            text: Transcribed text
+            trace: Latency trace of the utterance, from LatencyTracer.take()
+        """
+        item = (text, trace)
+        try:
+            self._transcripts.put_nowait(item)
+        except queue.Full:
+            logger.warning("Command pipeline backed up, waiting for a free slot")
+            self._transcripts.put(item)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Finish queued transcriptions, then stop the worker threads
+
+        If the queue does not drain within timeout, queued work is dropped;
+        either way the output thread has stopped using the output handler
+        on return, unless it is stuck in a single save for another timeout.
+        """
+        if not self._parser.is_alive():
+            return
+        try:
+            self._transcripts.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Command pipeline did not drain, dropping queued commands")
+            self._aborted.set()
+            # Emptying the queues also frees a parser blocked on a full output queue
+            for pending in (self._transcripts, self._commands):
+                self._discard(pending)
+                try:
+                    pending.put_nowait(self._STOP)
+                except queue.Full:
+                    pass  # Refilled by the parser, which now sees _aborted
+        self._parser.join(timeout)
+        self._writer.join(timeout)
+        if self._writer.is_alive():
+            logger.warning("Command output thread did not stop within %.0fs", timeout)
+
+    @staticmethod
+    def _discard(pending: queue.Queue) -> None:
+        """Drop everything waiting in a queue"""
+        try:
+            while True:
+                pending.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _parse_loop(self) -> None:
+        """Parser thread: transcription -> command"""
+        while True:
+            item = self._transcripts.get()
+            if self._aborted.is_set():
+                return
+            if item is self._STOP:
+                self._commands.put(self._STOP)
+                return
+            text, trace = item
+            try:
+                LatencyTracer.mark(trace, "parse_start")
+                commands = self.processor.process_all(text)
+                LatencyTracer.mark(trace, "parse_end")
+                if trace is not None:
+                    for command in commands:
+                        command["trace_id"] = trace["trace_id"]
+                self._commands.put((commands, trace))
+            except Exception as e:
+                logger.error("Failed to process '%s': %s", text, e, exc_info=True)
+
+    def _output_loop(self) -> None:
+        """Output thread: save and log each command"""
+        while True:
+            item = self._commands.get()
+            if item is self._STOP or self._aborted.is_set():
+                return
+            commands, trace = item
+            try:
+                # Save output regardless of status
+                LatencyTracer.mark(trace, "save_start")
+                if len(commands) == 1:
+                    self.output_handler.save_command(commands[0])
+                else:
+                    self.output_handler.save_batch(commands)
+                LatencyTracer.mark(trace, "save_end")
+                durations = {}
+                if trace is not None and self.tracer is not None:
+                    durations = self.tracer.complete(trace)
+                log = log_command_summary if self.quiet else log_command
+                for command in commands[:-1]:
+                    log(command)
+                log(commands[-1], durations)
+            except Exception as e:
+                logger.error("Failed to output command: %s", e, exc_info=True)
+
+
+def log_command(command: dict, durations: dict = None) -> None:
+    """
+    Log the result of a processed command
+
+    Args:
+        command: Command dict from ArtilleryCommandProcessor.process
+        durations: Stage durations in ms from LatencyTracer.complete
+    """
+    if command["status_code"] == 200:
+        command_logger.info("✓ %s %s", command["status_code"], command["reason_phrase"])
+        command_logger.info("📋 Intent: %s", command["intent"])
+        command_logger.info("📍 Coordinates: x=%s, y=%s", command["x"], command["y"])
+    else:
+        command_logger.error("❌ %s %s", command["status_code"], command["reason_phrase"])
+        if command["intent"]:
+            command_logger.info("📋 Intent: %s", command["intent"])
+        if command["x"] or command["y"]:
+            command_logger.info("📍 Coordinates: x=%s, y=%s", command["x"], command["y"])
+
+    if durations and command_logger.isEnabledFor(logging.INFO):
+        command_logger.info(
+            "⏱️  Trace %s: %s",
+            command.get("trace_id", "")[:8],
+            ", ".join(f"{stage} {ms:.1f}ms" for stage, ms in durations.items()),
+        )
+    command_logger.info("")  # Empty line for readability
+
+
+def log_command_summary(command: dict, durations: dict = None) -> None:
+    """Log a processed command as a single line (quiet logging mode)"""
+    latency = (durations or {}).get("end_to_end")
+    logger.info(
+        "%s %s %s x=%s y=%s [%s]%s",
+        "✓" if command["status_code"] == 200 else "❌",
+        command["status_code"],
+        command["intent"],
+        command["x"],
+        command["y"],
+        command.get("trace_id", "-")[:8],
+        f" {latency:.0f}ms" if latency is not None else "",
+        extra={
+            "trace_id": command.get("trace_id"),
+            "status_code": command["status_code"],
+            "intent": command["intent"],
+            "x": command["x"],
+            "y": command["y"],
+            "latency_ms": latency,
+        },
+    )
+
+
+# ====== Settings Reload ======
+class SettingsWatcher:
+    """
+    Reloads command patterns when settings.json changes, without a restart
+
+    A background thread checks the file's mtime and size, and on a change
+    compares a hash of the content. New patterns are parsed, validated and
+    compiled on that thread, then swapped into the processor in one step.
+    A file that fails to parse or contains an invalid regex is rejected and
+    the last good configuration stays active.
+    """
+
+    # Settings that are only read at startup
+    RESTART_KEYS = (
+        "wake_word", "activation", "stt_model", "autotune", "cpu", "early_endpoint", "runtime",
+        "output_mode", "profile_directory", "socket", "logging",
+    )
+
+    def __init__(self, processor, settings_file: str, interval: float = 1.0, on_reload=None):
+        """
+        Remember the current state of the settings file
+
+        Args:
+            processor: ArtilleryCommandProcessor whose patterns are swapped
+            settings_file: Path of settings.json
+            interval: Seconds between checks
+            on_reload: Optional callable(patterns) run after a successful swap
+        """
+        self.processor = processor
+        self.path = Path(settings_file)
+        self.interval = interval
+        self.on_reload = on_reload
+        self._stopped = threading.Event()
+        self._stat = self._read_stat()
+        self._digest = self._read_digest()
+        self._thread = threading.Thread(target=self._run, name="settings-watcher", daemon=True)
+
+    def start(self) -> None:
+        """Start watching"""
+        self._thread.start()
+        logger.info(f"Watching '{self.path}' for changes")
+
+    def stop(self) -> None:
+        """Stop watching"""
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.interval + 1.0)
+
+    def check(self) -> Optional[bool]:
+        """
+        Reload if the file changed since the last check
+
+        Returns:
+            True if new patterns were swapped in, False if the change was
+            rejected, None if nothing changed
+        """
+        stat = self._read_stat()
+        if stat == self._stat:
+            return None
+        self._stat = stat
+
+        started = time.perf_counter()
+        try:
+            content = self.path.read_bytes()
+        except OSError as e:
+            logger.warning(f"Cannot read '{self.path}': {e}, keeping current settings")
+            return False
+        digest = hashlib.sha256(content).hexdigest()
+        if digest == self._digest:
+            return None  # Touched or rewritten with the same content
+        self._digest = digest
+
+        try:
+            settings = json.loads(content)
+            if not isinstance(settings, dict):
+                raise TypeError("settings must be a JSON object")
+            if "commands" in settings:
+                patterns = self.processor.patterns_from_settings(settings)
+            else:
+                patterns = self.processor._get_default_patterns()
+            self._validate(patterns)
+            matchers = self.processor.compile_matchers(patterns, settings)
+        except (ValueError, TypeError, AttributeError, re.error) as e:
+            elapsed = (time.perf_counter() - started) * 1000
+            logger.error(
+                f"❌ Settings reload rejected after {elapsed:.1f}ms, keeping last good settings: {e}"
+            )
+            return False
+
+        previous = Config._load_settings()
+        self.processor.swap_patterns(patterns, matchers)
+        Config.set_settings(settings)
+        elapsed = (time.perf_counter() - started) * 1000
+        logger.info(f"✓ Reloaded {len(patterns)} command patterns in {elapsed:.1f}ms")
+
+        changed = [key for key in self.RESTART_KEYS if settings.get(key) != previous.get(key)]
+        if changed:
+            logger.warning(f"Restart to apply changes to: {', '.join(changed)}")
+        if self.on_reload is not None:
+            try:
+                self.on_reload(patterns)
+            except Exception as e:
+                logger.error(f"Settings reload hook failed: {e}")
+        return True
+
+    @staticmethod
+    def _validate(patterns: list) -> None:
+        """Raise ValueError listing every pattern that does not compile"""
+        errors = []
+        for pattern, intent in patterns:
+            try:
+                re.compile(pattern, re.IGNORECASE)
+            except re.error as e:
+                errors.append(f"'{intent}': {pattern} ({e})")
+        if errors:
+            raise ValueError("invalid pattern " + "; ".join(errors))
+
+    def _read_stat(self) -> Optional[tuple]:
+        """(mtime, size) of the settings file, or None if it does not exist"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_digest(self) -> Optional[str]:
+        """Hash of the settings file content, or None if unreadable"""
+        try:
+            return hashlib.sha256(self.path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+
+    def _run(self) -> None:
+        """Watcher thread: poll until stopped"""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Settings watcher error: {e}", exc_info=True)
+
+
+# ====== Recognizer Vocabulary ======
+def intent_display_name(intent: str) -> str:
+    """Spoken form of an intent name ("call_large_barrage" -> "large barrage")"""
+    return intent.replace("call_", "").replace("_", " ")
+
+
+def build_vocabulary_prompt(processor, max_intents: int = 12) -> str:
+    """
+    Build a Whisper initial prompt from the command vocabulary
+
+    Whisper continues the style of its prompt, so a few example calls
+    written the way the processor parses them bias decoding towards the
+    intent phrases, digits written as numerals and radio words such as
+    "niner" that smaller models otherwise mishear. Each call uses the
+    longest phrase its pattern matches (e.g. "small mortar barrage"), and
+    radio words are spoken as keypads. Every sentence is parsed back and
+    left out unless it yields its own intent, grid and keypad. The sample
+    digits cycle through every digit in WORD_TO_DIGIT.
+
+    Args:
+        processor: ArtilleryCommandProcessor whose patterns are described
+        max_intents: Most intents to include; Whisper only keeps the last
+            224 prompt tokens
+
+    Returns:
+        Prompt text, e.g. "Mortar shell, grid 012 345. Small mortar barrage,
+        grid 6789 0123, keypad niner."
+    """
+    words = ArtilleryCommandProcessor.WORD_TO_DIGIT
+    digits = "".join(sorted(set(words.values())))
+    radio_keypads = [
+        (word, int(words[word]))
+        for word in ArtilleryCommandProcessor.RADIO_WORDS
+        if words.get(word, "").isdigit() and 1 <= int(words[word]) <= 9
+    ]
+    sentences = []
+    position = 0
+    for index, (pattern, intent) in enumerate(processor.INTENT_PATTERNS[:max_intents]):
+        precision = 3 if index % 2 == 0 else 4
+        sample = "".join(digits[(position + offset) % len(digits)] for offset in range(precision * 2))
+        easting, northing = sample[:precision], sample[precision:]
+        keypad = spoken_keypad = None
+        if index % 2:
+            keypad = index % 9 + 1
+            spoken_keypad = str(keypad)
+            if radio_keypads:
+                spoken_keypad, keypad = radio_keypads.pop(0)
+
+        phrases = sorted(FuzzyIntentIndex._expand(pattern) or [], key=len, reverse=True)
+        for phrase in phrases + [intent_display_name(intent)]:
+            sentence = f"{phrase.capitalize()}, grid {easting} {northing}"
+            if spoken_keypad:
+                sentence += f", keypad {spoken_keypad}"
+            sentence += "."
+            if processor.command_signature(sentence) == ((intent, easting, northing, keypad),):
+                sentences.append(sentence)
+                position += precision * 2
+                break
+        else:
+            logger.warning(f"No prompt sentence for '{intent}' parses back to it, leaving it out")
+            if spoken_keypad and not spoken_keypad.isdigit():
+                radio_keypads.insert(0, (spoken_keypad, keypad))
+    return " ".join(sentences)
+
+
+def recorder_options(processor) -> dict:
+    """
+    AudioToTextRecorder decoding options from settings.json
+
+    "stt_options" are passed through as-is. Unless they set initial_prompt
+    or "vocabulary_prompt" is false, the prompt is built from the
+    processor's patterns.
+    """
+    options = Config.get_stt_options()
+    if "initial_prompt" not in options and Config.get_vocabulary_prompt():
+        options["initial_prompt"] = build_vocabulary_prompt(processor)
+    return options
+
+
+# ====== CPU Budget ======
+def set_cpu_affinity(cores: list) -> bool:
+    """
+    Restrict this process to cores; processes it starts later inherit this
+
+    Returns:
+        False if the platform has no affinity API (e.g. macOS)
+
+    Raises:
+        OSError: A core does not exist or the call was refused
+    """
+    if hasattr(os, "sched_setaffinity"):
+        # Linux sets affinity per thread, so move the threads already running too
+        try:
+            thread_ids = [int(thread_id) for thread_id in os.listdir("/proc/self/task")]
+        except OSError:
+            thread_ids = [0]
+        for thread_id in thread_ids:
+            try:
+                os.sched_setaffinity(thread_id, cores)
+            except ProcessLookupError:
+                pass  # Thread exited
+        return True
+    if os.name == "nt":
+        import ctypes
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+        kernel32.SetProcessAffinityMask.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+        mask = sum(1 << core for core in set(cores))
+        if not kernel32.SetProcessAffinityMask(kernel32.GetCurrentProcess(), mask):
+            raise OSError(ctypes.get_last_error(), "SetProcessAffinityMask failed")
+        return True
+    return False
+
+
+def limit_cpu(engine: str, threads: int, cores: list) -> None:
+    """
+    Apply one engine's thread cap and affinity
+
+    "stt" must be limited before the recorder starts its transcription
+    process, which inherits the affinity and whose CTranslate2 reads
+    OMP_NUM_THREADS. "wakeword" must be limited after that, as it narrows
+    this process, where wake word detection and the VAD run. openwakeword
+    already runs single-threaded, so its thread cap applies to torch, which
+    runs the Silero VAD.
+
+    Args:
+        engine: "stt" or "wakeword"
+        threads: Thread cap (0 = library default)
+        cores: Cores to run on (empty = any)
+    """
+    if threads:
+        if engine == "stt":
+            os.environ["OMP_NUM_THREADS"] = str(threads)
+        else:
+            try:
+                import torch
+
+                torch.set_num_threads(threads)
+            except ImportError:
+                pass
+        logger.info(f"CPU: {engine} limited to {threads} threads")
+    if cores:
+        try:
+            if set_cpu_affinity(cores):
+                logger.info(f"CPU: {engine} pinned to cores {', '.join(map(str, cores))}")
+            else:
+                logger.warning("CPU affinity is not supported on this platform")
+        except OSError as e:
+            logger.warning(f"Cannot pin {engine} to cores {cores}: {e}")
+
+
+def autotune_stt(
+    options: dict, max_threads: int = 0, force: bool = False, cached_only: bool = False
+) -> Optional[dict]:
+    """
+    Pick the speech model and thread count for this machine (cached)
+
+    Args:
+        options: AudioToTextRecorder options; compute_type, beam_size and
+            initial_prompt are measured as the recorder will use them
+        max_threads: Explicit cpu.stt_threads cap on the candidates (0 = none)
+        force: Measure even if the cached decision still applies
+        cached_only: Return None instead of measuring when nothing is cached
+
+    Returns:
+        Auto-tune decision with stt_model, stt_threads, decode_ms and
+        measurements, or None
+    """
+    # Imported here so faster-whisper is only loaded directly when tuning
+    from autotune import tune_cached
+
+    settings = Config.get_autotune_settings()
+    threads = settings["threads"]
+    if max_threads:
+        threads = [count for count in threads if count <= max_threads] or [max_threads]
+    return tune_cached(
+        settings["cache_file"],
+        force=force,
+        prompt=options.get("initial_prompt"),
+        cached_only=cached_only,
+        models=settings["models"],
+        threads=threads,
+        latency_budget_ms=settings["latency_budget_ms"],
+        audio=settings["audio"],
+        compute_type=options.get("compute_type", "int8"),
+        beam_size=options.get("beam_size", 5),
+    )
+
+
+# ====== Push-to-Talk ======
+class PushToTalk:
+    """
+    Records while a key is held, instead of listening for the wake word
+
+    Pressing the key starts recording, releasing it ends the utterance at
+    once, without waiting for end-of-speech silence. The recorder is created
+    without a wake word and text() is only called after a release, so
+    neither the wake word model nor the VAD runs while the key is up.
+    """
+
+    # Without these the recorder ignores quick presses and releases
+    RECORDER_OPTIONS = {"min_length_of_recording": 0, "min_gap_between_recordings": 0}
+
+    def __init__(self, recorder, key: str):
+        """
+        Args:
+            recorder: AudioToTextRecorder created without a wake word
+            key: pynput key name ("ctrl_r", "f8", "caps_lock", ...) or a single character
+        """
+        self.recorder = recorder
+        self.key_name = key
+        self._key = None
+        self._listener = None
+        self._held = False
+        self._released = threading.Event()
+
+    def start(self) -> None:
+        """
+        Install the global keyboard hook
+
+        Raises:
+            ValueError: The key name is not known to pynput
+        """
+        from pynput import keyboard
+
+        if len(self.key_name) == 1:
+            self._key = keyboard.KeyCode.from_char(self.key_name.lower())
+        else:
+            try:
+                self._key = keyboard.Key[self.key_name.lower()]
+            except KeyError:
+                raise ValueError(f"Unknown push-to-talk key '{self.key_name}'") from None
+
+        self._listener = keyboard.Listener(on_press=self._on_press, on_release=self._on_release)
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Remove the keyboard hook"""
+        if self._listener is not None:
+            self._listener.stop()
+
+    def wait(self) -> None:
+        """Block until the key is released after recording some audio"""
+        while True:
+            # Short waits keep Ctrl+C working on Windows
+            while not self._released.wait(0.5):
+                pass
+            self._released.clear()
+            if self.recorder.frames:
+                return
+            # text() would fall back to voice activity detection
+            logger.debug("Push-to-talk key released before any audio was recorded")
+
+    def _matches(self, key) -> bool:
+        """Whether key is the push-to-talk key ("ctrl" also matches either Ctrl key)"""
+        return key == self._key or self._listener.canonical(key) == self._key
+
+    def _on_press(self, key) -> None:
+        """Start recording; the auto-repeat of a held key is ignored"""
+        if self._held or not self._matches(key):
+            return
+        self._held = True
+        self.recorder.start()
+
+    def _on_release(self, key) -> None:
+        """End the utterance and let the recognition loop transcribe it"""
+        if not self._held or not self._matches(key):
+            return
+        self._held = False
+        self.recorder.stop()
+        self._released.set()
+
+
+# ====== Early Endpointing ======
+class EarlyEndpointer:
+    """
+    Ends the recording as soon as a complete command has been heard
+
+    With realtime transcription on, the recorder transcribes the audio so
+    far every few hundred milliseconds while recording. Each partial is
+    checked with ArtilleryCommandProcessor.command_signature(); once it has
+    an intent and a grid, and the command (keypad included, or its absence)
+    has not changed for the grace window, the recording is stopped instead
+    of waiting for the end-of-speech silence. A command still being spoken
+    keeps changing ("grid 12 34" becoming "grid 123 456", a keypad being
+    added), which restarts the window.
+
+    The recorder stops sending partials once it hears silence, so the
+    window is timed rather than waiting for another partial.
+    """
+
+    def __init__(self, processor, grace_seconds: float = 0.3):
+        """
+        Args:
+            processor: ArtilleryCommandProcessor to check partials with
+            grace_seconds: How long a complete command must stay unchanged
+        """
+        self.processor = processor
+        self.grace_seconds = grace_seconds
+        self.enabled = True
+        self.cuts = 0
+        self.recorder = None
+        self._lock = threading.Lock()
+        self._recording = None  # recording_start_time of the utterance being checked
+        self._signature = None
+        self._generation = 0
+
+    def recorder_options(self, realtime_model: str, processing_pause: float) -> dict:
+        """AudioToTextRecorder options that turn on the partials this needs"""
+        return {
+            "enable_realtime_transcription": True,
+            "realtime_model_type": realtime_model,
+            "realtime_processing_pause": processing_pause,
+            "on_realtime_transcription_update": self._on_partial,
+        }
+
+    def attach(self, recorder) -> None:
+        """Set the recorder to stop (once it has been created with recorder_options())"""
+        self.recorder = recorder
+
+    def _on_partial(self, text: str) -> None:
+        """Restart the grace window whenever the complete command changes"""
+        recorder = self.recorder
+        if not self.enabled or recorder is None or not recorder.is_recording:
+            return
+        signature = self.processor.command_signature(text)
+
+        with self._lock:
+            if recorder.recording_start_time != self._recording:
+                self._recording = recorder.recording_start_time
+                self._signature = None
+            if signature == self._signature:
+                return  # Unchanged: the window that is running decides
+            self._signature = signature
+            self._generation += 1
+            if signature is None:
+                return
+            generation = self._generation
+
+        timer = threading.Timer(self.grace_seconds, self._settle, args=(generation, text))
+        timer.daemon = True
+        timer.start()
+
+    def _settle(self, generation: int, text: str) -> None:
+        """End the recording if nothing changed during the grace window"""
+        recorder = self.recorder
+        with self._lock:
+            if generation != self._generation or not self.enabled:
+                return
+            if not recorder.is_recording or recorder.recording_start_time != self._recording:
+                return  # Already ended on silence
+            self._generation += 1
+            self.cuts += 1
+        command_logger.info("✂️  Early endpoint after '%s'", text)
+        recorder.stop()
+
+
+# ====== Runtime Profile ======
+class DeferredModule(types.ModuleType):
+    """
+    Stands in for a module that a dependency imports but this app may never use
+
+    Named attributes are handed out as stand-ins, so "from module import
+    name" does not load anything. The real module is imported the first
+    time a stand-in is called, any other attribute is read or one of its
+    submodules is imported (see DeferredModuleFinder).
+    """
+
+    # Probed by the import system and inspection tools; reading them must not load anything
+    PROBED_ATTRIBUTES = frozenset(("__file__", "__all__", "__wrapped__"))
+
+    def __init__(self, name: str, attributes: tuple):
+        super().__init__(name)
+        self._deferred_attributes = frozenset(attributes)
+        # Looks like a package, so submodule imports reach DeferredModuleFinder
+        self.__path__ = []
+
+    def __getattr__(self, attribute: str):
+        if attribute in self.PROBED_ATTRIBUTES:
+            raise AttributeError(attribute)
+        if attribute in self._deferred_attributes:
+            return DeferredAttribute(self, attribute)
+        return getattr(self.load(), attribute)
+
+    def load(self) -> types.ModuleType:
+        """Import the real module in place of this one"""
+        if sys.modules.get(self.__name__) is self:
+            del sys.modules[self.__name__]
+        return importlib.import_module(self.__name__)
+
+
+class DeferredAttribute:
+    """A class or function of a DeferredModule, resolved when first used"""
+
+    def __init__(self, module: DeferredModule, name: str):
+        self._module = module
+        self._name = name
+
+    def __call__(self, *args, **kwargs):
+        return getattr(self._module.load(), self._name)(*args, **kwargs)
+
+    def __getattr__(self, attribute: str):
+        return getattr(getattr(self._module.load(), self._name), attribute)
+
+
+class DeferredModuleFinder:
+    """
+    Loads a DeferredModule when one of its submodules is imported
+
+    Loading the real package usually imports the submodule as well. It is
+    then handed to the import system as already loaded, so its code does
+    not run a second time.
+    """
+
+    class _LoadedModule:
+        """Loader of a module that is already imported"""
+
+        def __init__(self, module: types.ModuleType):
+            self.module = module
+
+        def create_module(self, spec):
+            return self.module
+
+        def exec_module(self, module):
+            module.__spec__ = self.module_spec  # The import system set ours
+
+    @classmethod
+    def find_spec(cls, name: str, path=None, target=None):
+        parent = sys.modules.get(name.rpartition(".")[0])
+        if not isinstance(parent, DeferredModule):
+            return None
+        parent.load()
+        module = sys.modules.pop(name, None)
+        if module is None:
+            return importlib.util.find_spec(name)
+        loader = cls._LoadedModule(module)
+        loader.module_spec = module.__spec__
+        return importlib.util.spec_from_loader(name, loader)
+
+
+def defer_imports(modules: dict) -> None:
+    """
+    Register DeferredModule stand-ins for modules not imported yet
+
+    Args:
+        modules: Module name -> names other modules import from it
+    """
+    if DeferredModuleFinder not in sys.meta_path:
+        sys.meta_path.insert(0, DeferredModuleFinder)
+    for name, attributes in modules.items():
+        if name not in sys.modules:
+            sys.modules[name] = DeferredModule(name, attributes)
+
+
+# Imported by RealtimeSTT in every process, used by only some of them
+LEAN_DEFERRED_IMPORTS = {
+    # scikit-learn, for training custom wake word verifiers
+    "openwakeword.custom_verifier_model": ("train_custom_verifier",),
+    # Only the transcription process decodes speech
+    "faster_whisper": ("WhisperModel", "BatchedInferencePipeline", "decode_audio"),
+}
+
+# Recorder defaults in the lean profile (stt_options still override them)
+LEAN_RECORDER_OPTIONS = {
+    "batch_size": 0,  # Plain WhisperModel instead of the batched pipeline
+    "realtime_batch_size": 0,
+    "silero_use_onnx": True,  # On onnxruntime, which openwakeword uses too, not TorchScript
+    "faster_whisper_vad_filter": False,  # The recorder's VAD has already trimmed the audio
+}
+
+# RealtimeSTT's spawned processes run this module as __mp_main__, so they defer the same
+# imports; main() does it for the app itself. Tools importing this module are left alone.
+if __name__ in ("__main__", "__mp_main__") and Config.get_runtime_settings()["profile"] == "lean":
+    defer_imports(LEAN_DEFERRED_IMPORTS)
+
+
+# ====== Memory Accounting ======
+@functools.lru_cache(maxsize=None)
+def _windows_memory_api():
+    """ctypes bindings for K32GetProcessMemoryInfo"""
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+    kernel32.OpenProcess.restype = ctypes.c_void_p
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.CloseHandle.argtypes = (ctypes.c_void_p,)
+    kernel32.K32GetProcessMemoryInfo.argtypes = (
+        ctypes.c_void_p, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD
+    )
+    return kernel32, ProcessMemoryCounters
+
+
+def process_rss(pid: int = None) -> Optional[int]:
+    """
+    Resident set size (working set on Windows) of a process in bytes
+
+    Args:
+        pid: Process id (None = this process)
+
+    Returns:
+        Bytes, or None if unavailable on this platform or the process is gone
+    """
+    if os.name == "nt":
+        import ctypes
+
+        kernel32, ProcessMemoryCounters = _windows_memory_api()
+        # PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_VM_READ
+        handle = kernel32.GetCurrentProcess() if pid is None else kernel32.OpenProcess(0x1010, False, pid)
+        if not handle:
+            return None
+        try:
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            if not kernel32.K32GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return None
+            return counters.WorkingSetSize
+        finally:
+            if pid is not None:
+                kernel32.CloseHandle(handle)
+
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ImportProfiler:
+    """
+    Charges import time and RSS growth to top-level packages
+
+    While active, builtins.__import__ is wrapped on the thread that started
+    it. Each package is charged with its own modules only; what they import
+    from other packages goes to those (RealtimeSTT importing torch is
+    charged to torch). Modules loaded with importlib.import_module are
+    charged to the package that called it.
+    """
+
+    def __init__(self):
+        self.packages = {}  # Top-level package -> [seconds, rss bytes]
+        self._stack = []  # [seconds, rss bytes] of nested imports, per import in progress
+        self._original = None
+        self._thread = None
+
+    def start(self) -> None:
+        """Start charging imports made on this thread"""
+        if self._original is None:
+            self._original = builtins.__import__
+            self._thread = threading.current_thread()
+            builtins.__import__ = self._import
+
+    def stop(self) -> None:
+        """Restore the plain import"""
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def top(self, count: int = 10) -> list:
+        """
+        Packages that grew RSS the most
+
+        Returns:
+            List of dicts with package, rss_mb and seconds
+        """
+        ranked = sorted(self.packages.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {"package": package, "rss_mb": round(rss / 2**20, 1), "seconds": round(seconds, 3)}
+            for package, (seconds, rss) in ranked[:count]
+        ]
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """builtins.__import__ replacement"""
+        original = self._original or builtins.__import__
+        if (
+            (level == 0 and not fromlist and name in sys.modules)
+            or threading.current_thread() is not self._thread
+        ):
+            return original(name, globals, locals, fromlist, level)
+
+        if level:
+            package = (globals or {}).get("__package__") or ""
+        else:
+            package = name
+        package = package.partition(".")[0] or "?"
+
+        start = time.perf_counter()
+        rss = process_rss() or 0
+        self._stack.append([0.0, 0])
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            nested_seconds, nested_rss = self._stack.pop()
+            seconds = time.perf_counter() - start
+            grown = (process_rss() or 0) - rss
+            if self._stack:
+                self._stack[-1][0] += seconds
+                self._stack[-1][1] += grown
+            totals = self.packages.setdefault(package, [0.0, 0])
+            totals[0] += seconds - nested_seconds
+            totals[1] += grown - nested_rss
+
+
+def memory_report(recorder, imports: ImportProfiler, budget_mb: float = None) -> dict:
+    """
+    RSS of the app's processes and the packages that grew it most
+
+    Shared libraries count in every process that maps them, so the total
+    is an upper bound.
+
+    Args:
+        recorder: Started AudioToTextRecorder (its child processes are included)
+        imports: Profiler that watched the startup imports
+        budget_mb: Memory budget to compare the total with
+
+    Returns:
+        Dict with processes (name -> MB), total_mb, budget_mb and imports
+    """
+    processes = {"main": process_rss()}
+    for name, attribute in (("transcription", "transcript_process"), ("audio", "reader_process")):
+        pid = getattr(getattr(recorder, attribute, None), "pid", None)
+        if pid:
+            processes[name] = process_rss(pid)
+    megabytes = {name: round(rss / 2**20, 1) for name, rss in processes.items() if rss is not None}
+    return {
+        "processes": megabytes,
+        "total_mb": round(sum(megabytes.values()), 1),
+        "budget_mb": budget_mb,
+        "imports": imports.top(),
+    }
+
+
+def log_memory_report(report: dict) -> None:
+    """Log process RSS, the heaviest imports and a warning when over budget"""
+    processes = ", ".join(f"{name} {mb:.0f} MB" for name, mb in report["processes"].items())
+    logger.info(f"🧠 Memory at ready: {report['total_mb']:.0f} MB ({processes})")
+    for entry in report["imports"]:
+        logger.info(f"    {entry['package']:<20} {entry['rss_mb']:7.1f} MB {entry['seconds']:6.2f}s")
+    budget = report["budget_mb"]
+    if budget and report["total_mb"] > budget:
+        logger.warning(f"Memory use {report['total_mb']:.0f} MB is over the {budget:.0f} MB budget")
+
+
+# ====== Startup ======
+class StartupProfiler:
+    """Records how long each startup phase takes"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as phase name (repeated phases add up)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def time_to_ready(self) -> float:
+        """Seconds since the profiler was created"""
+        return time.perf_counter() - self.started
+
+    def log_breakdown(self) -> None:
+        """Log the time spent in each phase and the total"""
+        logger.info("⏱️  Startup breakdown:")
+        for name, seconds in self.phases.items():
+            logger.info(f"    {name:<12} {seconds:7.2f}s")
+        logger.info(f"    {'total':<12} {self.time_to_ready():7.2f}s")
+
+    def report(self, **details) -> dict:
+        """Startup record for --startup-profile"""
+        return {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **details,
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "time_to_ready": round(self.time_to_ready(), 3),
+        }
+
+
+def warm_up_recorder(recorder, profiler: StartupProfiler) -> None:
+    """
+    Run each model once on silence so the first command is not slowed down
+
+    RealtimeSTT already transcribes a warm-up clip in its transcription
+    process; this also exercises the path from the recorder to that process,
+    the VAD and the wake word model, which otherwise initialize on the first
+    audio the recorder listens to. The recorder does not run either model
+    before text() is first called, so this does not race its worker thread.
+    Failures only cost the warm-up.
+
+    Args:
+        recorder: Started AudioToTextRecorder
+        profiler: Profiler to record the phase timings in
+    """
+    import numpy as np
+
+    with profiler.phase("warmup"):
+        wakeword_model = getattr(recorder, "owwModel", None)
+        if wakeword_model is not None:
+            try:
+                # openwakeword scores 80 ms frames; a few fill its feature buffer
+                silence = np.zeros(1280, dtype=np.int16)
+                for _ in range(5):
+                    wakeword_model.predict(silence)
+                wakeword_model.reset()
+            except Exception as e:
+                logger.warning(f"Wake word warm-up failed: {e}")
+
+        try:
+            # One 32 ms frame of 16-bit silence at 16 kHz
+            recorder._is_silero_speech(bytes(1024))
+            recorder.silero_vad_model.reset_states()
+        except Exception as e:
+            logger.warning(f"VAD warm-up failed: {e}")
+
+        try:
+            recorder.perform_final_transcription(np.zeros(16000, dtype=np.float32))
+        except Exception as e:
+            logger.warning(f"Transcription warm-up failed: {e}")
+
+
+def start_recorder(
+    wake_word: str,
+    stt_model: str,
+    profiler: StartupProfiler,
+    callbacks: dict = None,
+    options: dict = None,
+):
+    """
+    Import the audio stack, load the models and warm them up
+
+    Args:
+        wake_word: openwakeword model name ("" to start recording on voice
+            activity or with recorder.start())
+        stt_model: Whisper model name
+        profiler: Profiler to record the phase timings in
+        callbacks: Extra AudioToTextRecorder callbacks (e.g. from LatencyTracer)
+        options: Extra AudioToTextRecorder options; these override the defaults
+
+    Returns:
+        AudioToTextRecorder ready to listen
+    """
+    with profiler.phase("imports"):
+        # Imported here so the command processor can be used without the audio stack
+        from RealtimeSTT import AudioToTextRecorder
+
+    kwargs = {
+        "model": stt_model,
+        "wake_words": wake_word,
+        "language": "en",
+        "compute_type": "int8",
+        **(options or {}),
+        **(callbacks or {}),
+    }
+    if wake_word:
+        # Any openwakeword backend turns on wake word detection, even without a wake word
+        kwargs.setdefault("wakeword_backend", "openwakeword")
+    with profiler.phase("model_load"):
+        recorder = AudioToTextRecorder(**kwargs)
+
+    warm_up_recorder(recorder, profiler)
+    return recorder
+
+
+def measure_idle_cpu(recorder, seconds: float, listen: bool) -> dict:
+    """
+    Measure the CPU time this process uses while waiting for a command
+
+    Only this process is counted: wake word detection and the VAD run here,
+    while audio capture and transcription run in RealtimeSTT's own processes
+    and cost the same in every activation mode.
+
+    Args:
+        recorder: Started AudioToTextRecorder
+        seconds: How long to measure
+        listen: Call text() in the background first, as the wake word loop
+            does (push-to-talk never calls it while the key is up)
+
+    Returns:
+        Dict with seconds, cpu_seconds and cpu_percent (of one core)
+    """
+    if listen:
+        threading.Thread(target=recorder.text, name="idle-listen", daemon=True).start()
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    time.sleep(seconds)
+    cpu_seconds = time.process_time() - cpu_start
+    wall_seconds = time.perf_counter() - wall_start
+    return {
+        "seconds": round(wall_seconds, 3),
+        "cpu_seconds": round(cpu_seconds, 3),
+        "cpu_percent": round(100 * cpu_seconds / wall_seconds, 1),
+    }
+
+
+def write_startup_profile(record: dict, path: Optional[str]) -> None:
+    """Print the startup record, or append it as one JSON line to path"""
+    if not path:
+        print(json.dumps(record, indent=2))
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    logger.info(f"Startup profile appended to '{path}'")
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Arma Reforger voice command processor")
+    parser.add_argument(
+        "--startup-profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="FILE",
+        help="Start up, report the time spent in each startup phase and exit; "
+        "with FILE, append the report to it as one JSON line",
+    )
+    parser.add_argument(
+        "--idle-cpu",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="With --startup-profile, also measure idle CPU use for SECONDS "
+        "in the configured activation mode",
+    )
+    parser.add_argument(
+        "--autotune",
+        action="store_true",
+        help="Measure the candidate speech models again and update the cached choice",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Log one line per command (overrides logging.mode in settings.json)",
+    )
+    args = parser.parse_args(argv)
+    if args.idle_cpu and args.startup_profile is None:
+        parser.error("--idle-cpu requires --startup-profile")
+    return args
 
 
 # ====== Main Application ======
-def main():
+def main(argv=None):
     """Main application entry point"""
+    args = parse_args(argv)
+    profiler = StartupProfiler()
+    imports = ImportProfiler()
+    if args.startup_profile is not None:
+        imports.start()
+    log_settings = Config.get_logging_settings()
+    if args.quiet:
+        log_settings["mode"] = "quiet"
+    log_listener = setup_logging(**log_settings)
+    output_handler = None
+    recorder = None
+    pipeline = None
+    watcher = None
+    push_to_talk = None
     try:
         logger.info("Initializing Arma Reforger Command Processor...")
+        runtime = Config.get_runtime_settings()
+        lean = runtime["profile"] == "lean"
+        if lean:
+            defer_imports(LEAN_DEFERRED_IMPORTS)
+            logger.info("Runtime profile: lean")
+
+        with profiler.phase("app_init"):
+            processor = ArtilleryCommandProcessor()
+            output_path = Config.get_profile_path()
+            output_handler = create_output_handler(
+                output_path, [intent for _, intent in processor.INTENT_PATTERNS]
+            )
 
-        processor = ArtilleryCommandProcessor()
-        output_path = Config.get_profile_path()
-        output_handler = OutputHandler(output_path)
-
-        wake_word = Config.get_wake_word()
+        activation = Config.get_activation_settings()
+        wake_word = Config.get_wake_word() if activation["mode"] == "wake_word" else ""
         stt_model = Config.get_stt_model()
+        options = recorder_options(processor)
+        if lean:
+            options = {**LEAN_RECORDER_OPTIONS, **options}
+        cpu = Config.get_cpu_settings()
+        stt_threads = cpu["stt_threads"]
+
+        # Applied first so auto-tune measures on the cores the model will get
+        limit_cpu("stt", 0, cpu["stt_affinity"])
+        if Config.get_autotune_settings()["enabled"] or args.autotune:
+            with profiler.phase("autotune"):
+                # Measuring loads every candidate model; lean only reads the cached choice
+                decision = autotune_stt(
+                    options, stt_threads, force=args.autotune, cached_only=lean and not args.autotune
+                )
+            if decision is None:
+                logger.info("Auto-tune: no cached choice for this machine; run with --autotune")
+            else:
+                stt_model, stt_threads = decision["stt_model"], decision["stt_threads"]
+                logger.info(
+                    f"Auto-tune: '{stt_model}' with {stt_threads} threads decodes a call in "
+                    f"{decision['decode_ms']:.0f}ms (tuned {decision['tuned_at']})"
+                )
+        limit_cpu("stt", stt_threads, [])
 
-        logger.info(f"Using wake word: '{wake_word}'")
+        if wake_word:
+            logger.info(f"Using wake word: '{wake_word}'")
+        else:
+            logger.info(f"Using push-to-talk key: '{activation['key']}'")
         logger.info(f"Using STT model: '{stt_model}'")
         logger.info(f"Output file: '{output_path}'")
         logger.info("Starting audio recorder...")
-        recorder = AudioToTextRecorder(
-            model=stt_model,
-            wake_words=wake_word,
-            wakeword_backend="openwakeword",
-            language="en",
-            compute_type="int8",
+        metrics = Config.get_metrics_settings(output_path)
+        tracer = LatencyTracer(metrics["file"], metrics["format"], metrics["window"])
+        if options.get("initial_prompt"):
+            logger.info(f"Recognizer prompt: '{options['initial_prompt']}'")
+        if not wake_word:
+            options.update(PushToTalk.RECORDER_OPTIONS)
+        endpoint = Config.get_endpoint_settings()
+        endpointer = None
+        if endpoint["enabled"] and lean:
+            logger.info("Early endpointing off in the lean profile (it loads a second model)")
+        elif endpoint["enabled"] and wake_word:  # Push-to-talk already ends on release
+            endpointer = EarlyEndpointer(processor, endpoint["grace_ms"] / 1000)
+            options.update(
+                endpointer.recorder_options(endpoint["realtime_model"], endpoint["processing_pause"])
+            )
+            logger.info(f"Early endpointing on (grace {endpoint['grace_ms']:.0f}ms)")
+        recorder = start_recorder(
+            wake_word, stt_model, profiler, tracer.recorder_callbacks(), options
         )
+        if endpointer is not None:
+            endpointer.attach(recorder)
+        limit_cpu("wakeword", cpu["wakeword_threads"], cpu["wakeword_affinity"])
+        if not wake_word:
+            with profiler.phase("hotkey"):
+                push_to_talk = PushToTalk(recorder, activation["key"])
+                push_to_talk.start()
+        imports.stop()
+        profiler.log_breakdown()
+        memory = memory_report(recorder, imports, runtime["memory_budget_mb"])
+        log_memory_report(memory)
+
+        if args.startup_profile is not None:
+            report = profiler.report(
+                stt_model=stt_model,
+                stt_threads=stt_threads,
+                activation=activation["mode"],
+                wake_word=wake_word,
+                runtime=runtime["profile"],
+                memory=memory,
+            )
+            if args.idle_cpu:
+                logger.info(f"Measuring idle CPU for {args.idle_cpu:g}s...")
+                report["idle_cpu"] = measure_idle_cpu(
+                    recorder, args.idle_cpu, listen=push_to_talk is None
+                )
+                logger.info(
+                    f"Idle CPU ({activation['mode']}): "
+                    f"{report['idle_cpu']['cpu_percent']:.1f}% of one core"
+                )
+            write_startup_profile(report, args.startup_profile)
+            return
 
-        logger.info(f"🎧 Listening for wake word '{wake_word.replace('_', ' ')}'...")
+        if push_to_talk is not None:
+            logger.info(f"🎙️  Hold '{activation['key']}' to give a command...")
+        else:
+            logger.info(f"🎧 Listening for wake word '{wake_word.replace('_', ' ')}'...")
         logger.info("Supported commands:")
         for _, intent in processor.INTENT_PATTERNS:
-            # Convert intent to readable format
-            display_name = intent.replace("call_", "").replace("_", " ")
-            logger.info(f"  - {display_name}")
+            logger.info(f"  - {intent_display_name(intent)}")
         logger.info("\nSupported MGRS formats (all output as 5x5 + 1 decimal):")
         logger.info("  Without keypad (defaults to center/keypad 5):")
         logger.info("    - 2x2: 'grid 12 34' -> x=12555.5, y=34555.5")
@@ -557,40 +3522,58 @@ def main():
         )
         logger.info("Press Ctrl+C to exit.\n")
 
-        # Main processing loop
+        # Recognition loop: hand each transcription to the pipeline and
+        # re-arm the recorder immediately
+        pipeline = CommandPipeline(
+            processor, output_handler, tracer=tracer, quiet=log_settings["mode"] == "quiet"
+        )
+        pipeline.start()
+
+        reload_interval = Config.get_reload_interval()
+        if reload_interval > 0:
+            set_intents = getattr(output_handler, "set_intents", None)
+            watcher = SettingsWatcher(
+                processor,
+                Config.SETTINGS_FILE,
+                reload_interval,
+                on_reload=(
+                    (lambda patterns: set_intents([intent for _, intent in patterns]))
+                    if set_intents
+                    else None
+                ),
+            )
+            watcher.start()
+
         while True:
+            if push_to_talk is not None:
+                push_to_talk.wait()
             text = recorder.text()
+            trace = tracer.take()
 
             if not text:
                 continue
 
-            logger.info(f"🗣️  Detected: '{text}'")
-
-            # Process command
-            command = processor.process(text)
-
-            # Save output to file regardless of status
-            output_handler.save_command(command)
-
-            # Log the results
-            if command["status_code"] == 200:
-                logger.info(f"✓ {command['status_code']} {command['reason_phrase']}")
-                logger.info(f"📋 Intent: {command['intent']}")
-                logger.info(f"📍 Coordinates: x={command['x']}, y={command['y']}")
-            else:
-                logger.error(f"❌ {command['status_code']} {command['reason_phrase']}")
-                if command["intent"]:
-                    logger.info(f"📋 Intent: {command['intent']}")
-                if command["x"] or command["y"]:
-                    logger.info(f"📍 Coordinates: x={command['x']}, y={command['y']}")
-            
-            print()  # Empty line for readability
+            command_logger.info("🗣️  Detected: '%s'", text)
+            pipeline.submit(text, trace)
 
     except KeyboardInterrupt:
         logger.info("\n👋 Shutting down gracefully...")
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
         raise
+    finally:
+        imports.stop()
+        if watcher is not None:
+            watcher.stop()
+        if push_to_talk is not None:
+            push_to_talk.stop()
+        if recorder is not None:
+            recorder.shutdown()
+        if pipeline is not None:
+            pipeline.stop()
+        if output_handler is not None:
+            output_handler.close()
+        log_listener.stop()
 
 
 if __name__ == "__main__":
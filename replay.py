@@ -0,0 +1,414 @@
+"""
+Audio Replay Harness
+Feeds recorded calls into the recorder instead of a microphone and runs the
+full wake word -> speech-to-text -> command processor -> output path, so
+end-to-end latency and results can be checked on machines without audio
+input (e.g. CI).
+
+Each file is fed at real-time pace (or --speed times faster), followed by
+silence so the recorder detects the end of speech. The report lists, per
+file, the command produced and the latency from the end of the audio to
+the saved command. With a manifest (same format as evaluate.py), the
+expected intent and coordinates are checked and the exit status is 1 when
+any file fails.
+
+With --compare-endpointing every file is replayed twice, without and with
+early endpointing, to show the latency it saves against the commands it
+cuts off too early.
+
+Usage:
+    python replay.py clips/ --manifest calls.jsonl
+    python replay.py --manifest calls.jsonl --speed 4
+    python replay.py call.wav --no-wake-word
+    python replay.py clips/ --compare-endpointing
+"""
+
+import argparse
+import json
+import logging
+import queue
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from evaluate import load_corpus
+from main import (
+    ArtilleryCommandProcessor,
+    CommandPipeline,
+    Config,
+    EarlyEndpointer,
+    LatencyTracer,
+    MultiOutputHandler,
+    StartupProfiler,
+    create_output_handler,
+    recorder_options,
+    setup_logging,
+    start_recorder,
+)
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Samples per feed_audio call (64 ms)
+CHUNK_SAMPLES = 1024
+
+AUDIO_EXTENSIONS = (".wav", ".flac")
+
+
+class CaptureOutputHandler:
+    """Hands every saved command to the replay loop"""
+
+    def __init__(self):
+        self.commands = queue.Queue()
+
+    def save_command(self, command: dict) -> None:
+        self.commands.put((time.perf_counter(), dict(command)))
+
+    def close(self) -> None:
+        pass
+
+
+def find_audio_files(paths: list) -> list:
+    """Expand directories into the audio files they contain, sorted by name"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(
+                child for child in path.iterdir() if child.suffix.lower() in AUDIO_EXTENSIONS
+            ))
+        else:
+            files.append(path)
+    return [str(file) for file in files]
+
+
+def read_audio(path: str):
+    """
+    Read an audio file as 16-bit mono samples
+
+    Returns:
+        Tuple of (int16 numpy array, sample rate)
+    """
+    import soundfile
+
+    samples, sample_rate = soundfile.read(path, dtype="int16", always_2d=True)
+    return samples.mean(axis=1).astype("int16"), sample_rate
+
+
+def feed(recorder, samples, sample_rate: int, speed: float) -> None:
+    """Feed samples to the recorder in chunks, paced like a live microphone"""
+    chunk_size = CHUNK_SAMPLES * sample_rate // SAMPLE_RATE
+    chunk_seconds = chunk_size / sample_rate / speed
+    next_time = time.perf_counter()
+    for start in range(0, len(samples), chunk_size):
+        recorder.feed_audio(samples[start:start + chunk_size], sample_rate)
+        next_time += chunk_seconds
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def listen(recorder, tracer: LatencyTracer, pipeline: CommandPipeline, stopped: threading.Event) -> None:
+    """Recognition loop, as in main(): transcribe and hand off to the pipeline"""
+    while not stopped.is_set():
+        text = recorder.text()
+        trace = tracer.take()
+        if text and not stopped.is_set():
+            logger.info(f"🗣️  Detected: '{text}'")
+            pipeline.submit(text, trace)
+
+
+def check(command: dict, expected: dict, tolerance: float) -> list:
+    """
+    Compare a command with the manifest expectations
+
+    Returns:
+        List of failure descriptions (empty if everything matched)
+    """
+    failures = []
+    if command is None:
+        return ["no command"]
+    if expected.get("intent") is not None and command["intent"] != expected["intent"]:
+        failures.append(f"intent {command['intent']} != {expected['intent']}")
+    for axis in ("x", "y"):
+        want = expected.get(axis)
+        got = command.get(axis)
+        if want is not None and (got is None or abs(got - want) > tolerance):
+            failures.append(f"{axis} {got} != {want}")
+    return failures
+
+
+def same_command(a: dict, b: dict) -> bool:
+    """Whether two commands (or None) have the same intent and coordinates"""
+    return all((a or {}).get(key) == (b or {}).get(key) for key in ("intent", "x", "y"))
+
+
+def replay_file(recorder, capture: CaptureOutputHandler, path: str, args, endpointer=None) -> dict:
+    """
+    Feed one file and wait for its command
+
+    Returns:
+        Result dict with file, command, latency_ms, duration and early_cut
+    """
+    import numpy as np
+
+    cuts = endpointer.cuts if endpointer is not None else 0
+
+    # Anything left over belongs to an earlier file
+    while not capture.commands.empty():
+        capture.commands.get_nowait()
+
+    samples, sample_rate = read_audio(path)
+    feed(recorder, samples, sample_rate, args.speed)
+    audio_end = time.perf_counter()
+
+    # Keep feeding silence, like a quiet microphone, until the command arrives
+    silence = np.zeros(CHUNK_SAMPLES, dtype=np.int16)
+    deadline = audio_end + args.timeout
+    saved_at, command = None, None
+    while time.perf_counter() < deadline:
+        try:
+            saved_at, command = capture.commands.get_nowait()
+            break
+        except queue.Empty:
+            feed(recorder, silence, SAMPLE_RATE, args.speed)
+
+    # Gap before the next file
+    for _ in range(int(args.gap * SAMPLE_RATE / CHUNK_SAMPLES)):
+        feed(recorder, silence, SAMPLE_RATE, args.speed)
+
+    return {
+        "file": path,
+        "duration": round(len(samples) / sample_rate, 2),
+        "command": command,
+        "latency_ms": round((saved_at - audio_end) * 1000, 1) if command else None,
+        "early_cut": endpointer is not None and endpointer.cuts > cuts,
+    }
+
+
+def latency_percentiles(results: list) -> tuple:
+    """p50 and p95 latency in ms (None when no command came back)"""
+    latencies = sorted(r["latency_ms"] for r in results if r["latency_ms"] is not None)
+    if not latencies:
+        return None, None
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, round(0.95 * len(latencies)) - 1)]
+    return p50, p95
+
+
+def print_report(results: list) -> None:
+    """Print one line per file and a latency/pass summary"""
+    print(f"\n{'file':<32} {'status':>6} {'intent':<24} {'latency':>9}  result")
+    print("-" * 90)
+    for result in results:
+        command = result["command"] or {}
+        latency = result["latency_ms"]
+        outcome = "ok" if not result["failures"] else "; ".join(result["failures"])
+        if not result["checked"]:
+            outcome = "-"
+        if result["early_cut"]:
+            outcome += " (early cut)"
+        print(
+            f"{Path(result['file']).name[:32]:<32} {command.get('status_code', '-'):>6} "
+            f"{str(command.get('intent'))[:24]:<24} "
+            f"{'-' if latency is None else f'{latency:.0f}ms':>9}  {outcome}"
+        )
+
+    p50, p95 = latency_percentiles(results)
+    checked = [r for r in results if r["checked"]]
+    passed = sum(not r["failures"] for r in checked)
+    print()
+    if p50 is not None:
+        print(f"Latency (end of audio -> command saved): p50 {p50:.0f}ms, p95 {p95:.0f}ms")
+    if checked:
+        print(f"Expectations met: {passed}/{len(checked)}")
+
+
+def compare_endpointing(off: list, on: list) -> dict:
+    """
+    Latency saved by early endpointing against the commands it got wrong
+
+    A false cut is an early cut whose command differs (intent, x or y)
+    from the command of the same file without early endpointing.
+
+    Args:
+        off: Results without early endpointing
+        on: Results of the same files with it
+
+    Returns:
+        Dict with per-mode p50/p95 latency, cuts, false_cuts (file names)
+        and saved_p50_ms (median latency saved per file)
+    """
+    saved = sorted(
+        before["latency_ms"] - after["latency_ms"]
+        for before, after in zip(off, on)
+        if before["latency_ms"] is not None and after["latency_ms"] is not None
+    )
+    modes = {}
+    for mode, results in (("off", off), ("on", on)):
+        p50, p95 = latency_percentiles(results)
+        modes[mode] = {"p50_ms": p50, "p95_ms": p95, "cuts": sum(r["early_cut"] for r in results)}
+    return {
+        "files": len(on),
+        "modes": modes,
+        "false_cuts": [
+            after["file"]
+            for before, after in zip(off, on)
+            if after["early_cut"] and not same_command(before["command"], after["command"])
+        ],
+        "saved_p50_ms": saved[len(saved) // 2] if saved else None,
+    }
+
+
+def print_endpointing(summary: dict) -> None:
+    """Print the latency/false-cut trade-off of early endpointing"""
+    print(f"\n{'endpointing':<12} {'p50':>8} {'p95':>8} {'cuts':>6}")
+    print("-" * 37)
+    for mode, stats in summary["modes"].items():
+        columns = ["-" if stats[key] is None else f"{stats[key]:.0f}ms" for key in ("p50_ms", "p95_ms")]
+        print(f"{mode:<12} {columns[0]:>8} {columns[1]:>8} {stats['cuts']:>6}")
+    print()
+    if summary["saved_p50_ms"] is not None:
+        print(f"Latency saved per file: p50 {summary['saved_p50_ms']:.0f}ms")
+    cuts = summary["modes"]["on"]["cuts"]
+    print(f"False early cuts: {len(summary['false_cuts'])}/{cuts}")
+    for path in summary["false_cuts"]:
+        print(f"    {Path(path).name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay recorded calls through the full recognition path"
+    )
+    parser.add_argument("inputs", nargs="*", help="Audio files or directories (WAV/FLAC)")
+    parser.add_argument(
+        "--manifest", help="Expectations (JSONL: audio, intent, x, y); replays all of it if no inputs"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Feed speed relative to real time (default: 1)"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=15.0, help="Seconds to wait for each command after its audio"
+    )
+    parser.add_argument(
+        "--gap", type=float, default=1.0, help="Seconds of silence between files"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.05, help="Allowed coordinate difference"
+    )
+    parser.add_argument(
+        "--no-wake-word",
+        action="store_true",
+        help="Start recording on voice activity; use for files without the wake word",
+    )
+    parser.add_argument(
+        "--compare-endpointing",
+        action="store_true",
+        help="Replay every file without and with early endpointing and compare them",
+    )
+    parser.add_argument(
+        "--output-dir", help="Directory for the command output (default: a temporary one)"
+    )
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    expectations = {}
+    if args.manifest:
+        for record in load_corpus(args.manifest):
+            expectations[str(Path(record["audio"]).resolve())] = record
+    files = find_audio_files(args.inputs) if args.inputs else [
+        record["audio"] for record in expectations.values()
+    ]
+    if not files:
+        parser.error("no audio files to replay")
+
+    log_listener = setup_logging(**Config.get_logging_settings())
+    processor = ArtilleryCommandProcessor()
+    capture = CaptureOutputHandler()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_path = str(Path(args.output_dir or temp_dir) / Config.OUTPUT_FILE)
+        output_handler = MultiOutputHandler([
+            create_output_handler(output_path, [intent for _, intent in processor.INTENT_PATTERNS]),
+            capture,
+        ])
+        tracer = LatencyTracer()
+        profiler = StartupProfiler()
+        options = recorder_options(processor)
+        options.update(
+            use_microphone=False,
+            spinner=False,
+            # Accelerated feeding must not make the recorder drop queued audio
+            handle_buffer_overflow=False,
+        )
+        endpoint = Config.get_endpoint_settings()
+        endpointer = None
+        if endpoint["enabled"] or args.compare_endpointing:
+            endpointer = EarlyEndpointer(processor, endpoint["grace_ms"] / 1000)
+            options.update(
+                endpointer.recorder_options(endpoint["realtime_model"], endpoint["processing_pause"])
+            )
+        wake_word = "" if args.no_wake_word else Config.get_wake_word()
+        recorder = start_recorder(
+            wake_word, Config.get_stt_model(), profiler, tracer.recorder_callbacks(), options
+        )
+        if endpointer is not None:
+            endpointer.attach(recorder)
+        profiler.log_breakdown()
+
+        pipeline = CommandPipeline(processor, output_handler, tracer=tracer)
+        pipeline.start()
+        stopped = threading.Event()
+        listener = threading.Thread(
+            target=listen, args=(recorder, tracer, pipeline, stopped), name="replay-listener", daemon=True
+        )
+        listener.start()
+
+        # Endpointing mode -> results; None when not comparing
+        modes = {"off": [], "on": []} if args.compare_endpointing else {None: []}
+        try:
+            for mode, results in modes.items():
+                if mode is not None:
+                    endpointer.enabled = mode == "on"
+                    logger.info(f"Early endpointing {mode}")
+                for path in files:
+                    logger.info(f"▶️  Replaying '{path}'")
+                    result = replay_file(recorder, capture, path, args, endpointer)
+                    expected = expectations.get(str(Path(path).resolve()))
+                    result["checked"] = expected is not None
+                    result["failures"] = (
+                        check(result["command"], expected, args.tolerance) if expected else []
+                    )
+                    results.append(result)
+        except KeyboardInterrupt:
+            logger.info("Interrupted")
+        finally:
+            stopped.set()
+            recorder.shutdown()
+            pipeline.stop()
+            output_handler.close()
+            log_listener.stop()
+
+    report = {"speed": args.speed}
+    for mode, results in modes.items():
+        if mode is not None:
+            print(f"\nEarly endpointing {mode}:")
+        print_report(results)
+    if args.compare_endpointing:
+        report["results"] = modes
+        if len(modes["on"]) == len(modes["off"]):  # Not when interrupted halfway
+            report["endpointing"] = compare_endpointing(modes["off"], modes["on"])
+            print_endpointing(report["endpointing"])
+    else:
+        report["results"] = modes[None]
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if any(result["failures"] for results in modes.values() for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
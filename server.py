@@ -0,0 +1,495 @@
+"""
+Multi-Client Server Mode
+Serves several players from one process: a single Whisper model is loaded
+once and utterances from all clients are transcribed together in batches,
+while each client gets its own command processor and output.
+
+Protocol (TCP, meant for localhost):
+    1. The client sends one JSON hello line, e.g.
+       {"client": "alpha", "output": "alpha_command.json"}
+       Both fields are optional. "output" is a file name in the profile
+       directory that receives the client's latest command, like the
+       single-player output file.
+    2. The client streams raw 16-bit mono PCM at 16 kHz.
+    3. The server sends each of the client's commands back as a JSON line.
+
+There is no wake word in server mode: voice activity detection splits each
+stream into utterances, so clients should only send audio while the player
+talks to the radio (push-to-talk).
+
+Usage:
+    python server.py
+    python server.py --port 47810 --max-batch 16
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from evaluate import transcribe_batch
+from main import (
+    ArtilleryCommandProcessor,
+    CommandPipeline,
+    Config,
+    LatencyTracer,
+    MultiOutputHandler,
+    OutputHandler,
+    command_logger,
+    recorder_options,
+    setup_logging,
+)
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Longest hello line accepted
+MAX_HELLO_BYTES = 4096
+
+
+class UtteranceSegmenter:
+    """Splits a PCM stream into utterances with WebRTC voice activity detection"""
+
+    # webrtcvad accepts 10, 20 or 30 ms frames
+    FRAME_MS = 30
+    FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000 * 2
+
+    def __init__(
+        self,
+        aggressiveness: int = 3,
+        silence_seconds: float = 0.6,
+        pre_roll_seconds: float = 0.3,
+        min_speech_seconds: float = 0.2,
+        max_seconds: float = 30.0,
+    ):
+        """
+        Args:
+            aggressiveness: webrtcvad mode, 0 (lenient) to 3 (strict)
+            silence_seconds: Silence that ends an utterance
+            pre_roll_seconds: Audio kept from before speech starts
+            min_speech_seconds: Shorter bursts of speech are dropped as noise
+            max_seconds: Utterances are cut at this length
+        """
+        import webrtcvad
+
+        self._vad = webrtcvad.Vad(aggressiveness)
+        self._silence_frames = max(1, round(silence_seconds * 1000 / self.FRAME_MS))
+        self._min_speech_frames = max(1, round(min_speech_seconds * 1000 / self.FRAME_MS))
+        self._max_frames = round(max_seconds * 1000 / self.FRAME_MS)
+        self._pre_roll = deque(maxlen=max(1, round(pre_roll_seconds * 1000 / self.FRAME_MS)))
+        self._pending = bytearray()
+        self._utterance = None
+        self._frames = 0
+        self._speech_frames = 0
+        self._silent_frames = 0
+
+    def feed(self, data: bytes):
+        """
+        Add PCM data
+
+        Yields:
+            ("start", None) when speech begins, ("end", pcm_bytes) when an
+            utterance is complete, ("drop", None) when speech was too short
+        """
+        self._pending += data
+        for start in range(0, len(self._pending) - self.FRAME_BYTES + 1, self.FRAME_BYTES):
+            frame = bytes(self._pending[start:start + self.FRAME_BYTES])
+            event = self._add_frame(frame)
+            if event is not None:
+                yield event
+        del self._pending[:len(self._pending) - len(self._pending) % self.FRAME_BYTES]
+
+    def _add_frame(self, frame: bytes):
+        """Advance the speech state by one frame"""
+        is_speech = self._vad.is_speech(frame, SAMPLE_RATE)
+
+        if self._utterance is None:
+            self._pre_roll.append(frame)
+            if not is_speech:
+                return None
+            self._utterance = bytearray(b"".join(self._pre_roll))
+            self._pre_roll.clear()
+            self._frames = self._speech_frames = 1
+            self._silent_frames = 0
+            return "start", None
+
+        self._utterance += frame
+        self._frames += 1
+        if is_speech:
+            self._speech_frames += 1
+            self._silent_frames = 0
+        else:
+            self._silent_frames += 1
+        if self._silent_frames < self._silence_frames and self._frames < self._max_frames:
+            return None
+
+        utterance, self._utterance = self._utterance, None
+        if self._speech_frames < self._min_speech_frames:
+            return "drop", None
+        return "end", bytes(utterance)
+
+
+class ConnectionOutputHandler:
+    """
+    Sends each command back to the client as a JSON line
+
+    A client that stops reading fills its socket buffer. Sends then time
+    out after SEND_TIMEOUT instead of blocking, and the client is
+    disconnected.
+    """
+
+    SEND_TIMEOUT = 2.0
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.failed = False
+        # A send timeout only: recv() waits indefinitely for a push-to-talk client
+        seconds = self.SEND_TIMEOUT
+        if os.name == "nt":
+            timeout = struct.pack("<I", int(seconds * 1000))  # DWORD milliseconds
+        else:
+            timeout = struct.pack("@ll", int(seconds), int(seconds % 1 * 1e6))  # struct timeval
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, timeout)
+        except OSError as e:
+            logger.warning(f"Cannot set a send timeout on the client socket: {e}")
+
+    def save_command(self, command: dict) -> None:
+        """Send command to the client; a closed connection is ignored"""
+        self.save_batch([command])
+
+    def save_batch(self, commands: list) -> None:
+        """Send the commands of one utterance as consecutive lines"""
+        if self.failed:
+            return
+        now = int(time.time())
+        for command in commands:
+            command["timestamp"] = now
+        data = "".join(json.dumps(command, ensure_ascii=False) + "\n" for command in commands)
+        try:
+            self.sock.sendall(data.encode("utf-8"))
+        except OSError as e:
+            # Timed out or closed: a partial line cannot be recovered, so drop the client
+            self.failed = True
+            logger.warning("Disconnecting client that is not reading its commands: %s", e)
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)  # Ends its recv loop in CommandServer._handle
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        pass
+
+
+class ClientSession:
+    """One connected player: its processor, outputs and command pipeline"""
+
+    def __init__(self, name: str, sock: socket.socket, output_path: str, tracer, quiet: bool):
+        self.name = name
+        self.closed = False
+        handlers = [ConnectionOutputHandler(sock)]
+        if output_path:
+            handlers.append(OutputHandler(output_path))
+        self.output_handler = MultiOutputHandler(handlers)
+        self.pipeline = CommandPipeline(
+            ArtilleryCommandProcessor(), self.output_handler, tracer=tracer, quiet=quiet
+        )
+        self.pipeline.start()
+
+    def submit(self, text: str, trace: dict) -> None:
+        """
+        Hand a transcription to this client's pipeline without waiting
+
+        Called on the shared decoder thread, so a backed-up client drops
+        the transcription instead of stalling every other client.
+        """
+        if not self.closed:
+            command_logger.info("🗣️  [%s] Detected: '%s'", self.name, text)
+            if not self.pipeline.try_submit(text, trace):
+                logger.warning("Client '%s' is backed up, dropping '%s'", self.name, text)
+
+    def close(self) -> None:
+        """Finish queued commands and release the outputs"""
+        self.closed = True
+        self.pipeline.stop()
+        self.output_handler.close()
+
+
+class BatchDecoder:
+    """
+    Transcribes utterances from every client on one shared model
+
+    Utterances queue up while a batch is decoding and are all taken as the
+    next batch, so batches grow with load and a lone speaker is not kept
+    waiting. batch_window can add a short wait to collect more.
+    """
+
+    _STOP = object()
+
+    def __init__(self, model_name: str, options: dict, max_batch: int = 8, batch_window: float = 0.0):
+        """
+        Load the model
+
+        Args:
+            model_name: Whisper model name or path
+            options: Recognizer options (initial_prompt, beam_size, device)
+            max_batch: Most utterances decoded together
+            batch_window: Seconds to wait for more utterances after the first
+        """
+        from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+        model = WhisperModel(
+            model_name, device=options.get("device", "auto"), compute_type="int8"
+        )
+        self._pipeline = BatchedInferencePipeline(model)
+        self.prompt = options.get("initial_prompt")
+        self.beam_size = options.get("beam_size", 5)
+        self.max_batch = max(1, max_batch)
+        self.batch_window = batch_window
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="batch-decoder", daemon=True)
+
+    def start(self) -> None:
+        """Start the decoder thread"""
+        self._thread.start()
+
+    def submit(self, session: ClientSession, pcm: bytes, trace: dict) -> None:
+        """Queue one utterance of 16-bit PCM for transcription"""
+        self._queue.put((session, pcm, trace))
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Finish queued utterances, then stop the decoder thread"""
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+    def _next_batch(self) -> list:
+        """Wait for one utterance, then take whatever else is queued"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch and batch[-1] is not self._STOP:
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.perf_counter())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        """Decoder thread: batch, transcribe, hand each text to its client"""
+        import numpy as np
+
+        while True:
+            batch = self._next_batch()
+            stopping = batch[-1] is self._STOP
+            if stopping:
+                batch.pop()
+            if batch:
+                for _, _, trace in batch:
+                    LatencyTracer.mark(trace, "transcription_start")
+                audio = [
+                    np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+                    for _, pcm, _ in batch
+                ]
+                try:
+                    texts = transcribe_batch(self._pipeline, audio, self.prompt, self.beam_size)
+                except Exception as e:
+                    logger.error(f"Batch transcription failed: {e}", exc_info=True)
+                    texts = [""] * len(batch)
+                logger.debug("Decoded a batch of %d", len(batch))
+
+                for (session, _, trace), text in zip(batch, texts):
+                    LatencyTracer.mark(trace, "transcribed")
+                    if text:
+                        session.submit(text, trace)
+            if stopping:
+                return
+
+
+class CommandServer:
+    """Accepts client connections and feeds their audio to the shared decoder"""
+
+    def __init__(self, host: str, port: int, decoder: BatchDecoder, tracer, output_dir: str, vad: dict, quiet: bool):
+        self.decoder = decoder
+        self.tracer = tracer
+        self.output_dir = Path(output_dir)
+        self.vad = vad
+        self.quiet = quiet
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen()
+        self._server.settimeout(0.5)
+        self._stopped = threading.Event()
+        self._sessions = set()
+        self._lock = threading.Lock()
+        logger.info(f"✓ Serving on tcp://{host}:{port}")
+
+    def serve_forever(self) -> None:
+        """Accept clients until stop() is called"""
+        while not self._stopped.is_set():
+            try:
+                sock, address = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(
+                target=self._handle, args=(sock, address), name=f"client-{address[1]}", daemon=True
+            ).start()
+
+    def stop(self) -> None:
+        """Stop accepting clients and close every connection"""
+        self._stopped.set()
+        self._server.close()
+        with self._lock:
+            sessions = list(self._sessions)
+        for sock, _ in sessions:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _read_hello(self, sock: socket.socket) -> tuple:
+        """
+        Read the hello line
+
+        Returns:
+            Tuple of (hello dict, audio bytes received after it)
+        """
+        data = b""
+        while b"\n" not in data:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("closed before hello")
+            data += chunk
+            if len(data) > MAX_HELLO_BYTES:
+                raise ValueError("hello line too long")
+        line, rest = data.split(b"\n", 1)
+        hello = json.loads(line) if line.strip() else {}
+        if not isinstance(hello, dict):
+            raise ValueError("hello must be a JSON object")
+        return hello, rest
+
+    def _handle(self, sock: socket.socket, address) -> None:
+        """Client thread: segment the stream and queue utterances for decoding"""
+        session = None
+        with sock:
+            try:
+                hello, audio = self._read_hello(sock)
+            except ConnectionError:
+                return  # Connected and left without a hello (e.g. a port check)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Rejected client {address[0]}:{address[1]}: {e}")
+                return
+
+            name = str(hello.get("client") or f"{address[0]}:{address[1]}")
+            output_path = None
+            if hello.get("output"):
+                # Only a file name: clients cannot write outside the output directory
+                output_path = str(self.output_dir / Path(str(hello["output"])).name)
+            # Before the session, whose threads only the finally below stops
+            segmenter = UtteranceSegmenter(**self.vad)
+            session = ClientSession(name, sock, output_path, self.tracer, self.quiet)
+            with self._lock:
+                self._sessions.add((sock, session))
+            logger.info(f"➕ Client '{name}' connected" + (f", output '{output_path}'" if output_path else ""))
+
+            trace = None
+            try:
+                while True:
+                    for event, pcm in segmenter.feed(audio):
+                        if event == "start":
+                            trace = LatencyTracer.new_trace()
+                            LatencyTracer.mark(trace, "recording_start")
+                        elif event == "end":
+                            LatencyTracer.mark(trace, "recording_stop")
+                            self.decoder.submit(session, pcm, trace)
+                            trace = None
+                        else:
+                            trace = None
+                    audio = sock.recv(65536)
+                    if not audio:
+                        break
+            except OSError:
+                pass
+            finally:
+                with self._lock:
+                    self._sessions.discard((sock, session))
+                session.close()
+                logger.info(f"➖ Client '{name}' disconnected")
+
+
+def parse_args(argv=None):
+    """Parse command line options; defaults come from the "server" settings block"""
+    settings = Config.get_server_settings()
+    parser = argparse.ArgumentParser(description="Serve several players from one shared model")
+    parser.add_argument("--host", default=settings["host"], help="Bind address (keep it on localhost)")
+    parser.add_argument("--port", type=int, default=settings["port"])
+    parser.add_argument(
+        "--max-batch", type=int, default=settings["max_batch"], help="Most utterances decoded together"
+    )
+    parser.add_argument(
+        "--batch-window-ms",
+        type=float,
+        default=settings["batch_window_ms"],
+        help="Extra wait for more utterances before decoding a batch",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Log one line per command")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Server mode entry point"""
+    args = parse_args(argv)
+    settings = Config.get_server_settings()
+    log_settings = Config.get_logging_settings()
+    if args.quiet:
+        log_settings["mode"] = "quiet"
+    log_listener = setup_logging(**log_settings)
+    decoder = None
+    server = None
+    try:
+        processor = ArtilleryCommandProcessor()
+        stt_model = Config.get_stt_model()
+        logger.info(f"Loading STT model '{stt_model}' (shared by all clients)...")
+        decoder = BatchDecoder(
+            stt_model,
+            recorder_options(processor),
+            args.max_batch,
+            args.batch_window_ms / 1000,
+        )
+        decoder.start()
+
+        output_path = Config.get_profile_path()
+        metrics = Config.get_metrics_settings(output_path)
+        tracer = LatencyTracer(metrics["file"], metrics["format"], metrics["window"])
+        server = CommandServer(
+            args.host,
+            args.port,
+            decoder,
+            tracer,
+            str(Path(output_path).parent),
+            settings["vad"],
+            log_settings["mode"] == "quiet",
+        )
+        logger.info("Press Ctrl+C to exit.\n")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("\n👋 Shutting down gracefully...")
+    finally:
+        if server is not None:
+            server.stop()
+        if decoder is not None:
+            decoder.stop()
+        log_listener.stop()
+
+
+if __name__ == "__main__":
+    main()
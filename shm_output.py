@@ -0,0 +1,276 @@
+"""
+Shared-Memory Command Slot
+Writes each command into a memory-mapped file with a fixed binary layout,
+so consumers can read it without parsing JSON.
+
+Layout (little-endian, 48 bytes):
+    offset  size  field
+    0       4     magic "VOXC"
+    4       4     layout version (uint32)
+    8       8     sequence (uint64, odd while a write is in progress)
+    16      4     intent id (int32, -1 = no intent; see the manifest)
+    20      4     status code (int32)
+    24      8     x (float64, NaN = none)
+    32      8     y (float64, NaN = none)
+    40      8     timestamp (float64, Unix seconds)
+
+The sequence number works as a seqlock: a reader reads it, then the
+payload, then the sequence again, and retries if the two differ or the
+first was odd. A manifest JSON file next to the slot maps intent ids to
+names. Ids are stable: they start in the order of "commands" in
+settings.json, and intents added later (by a reload or a restart that
+finds the manifest) get new ids, so an id never changes meaning while the
+manifest exists. Ids of removed intents stay reserved. A reader that
+sees an id missing from its copy of the manifest reads it again.
+"""
+
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"VOXC"
+LAYOUT_VERSION = 1
+
+HEADER = struct.Struct("<4sI")
+SEQUENCE = struct.Struct("<Q")
+PAYLOAD = struct.Struct("<iiddd")
+
+SEQUENCE_OFFSET = HEADER.size
+PAYLOAD_OFFSET = SEQUENCE_OFFSET + SEQUENCE.size
+SLOT_SIZE = PAYLOAD_OFFSET + PAYLOAD.size
+
+NO_INTENT = -1
+
+
+class CommandRecord:
+    """Compact fixed-layout form of a processed command"""
+
+    __slots__ = ("intent_id", "status_code", "x", "y", "timestamp")
+
+    def __init__(self, intent_id: int, status_code: int, x: float, y: float, timestamp: float):
+        self.intent_id = intent_id
+        self.status_code = status_code
+        self.x = x
+        self.y = y
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_command(cls, command: dict, intent_ids: dict, timestamp: float = None) -> "CommandRecord":
+        """
+        Build a record from a command dict produced by ArtilleryCommandProcessor.process
+
+        Args:
+            command: Command dict with status_code, intent, x and y
+            intent_ids: Map of intent name to id
+            timestamp: Unix time (default: now)
+        """
+        x = command.get("x")
+        y = command.get("y")
+        return cls(
+            intent_ids.get(command.get("intent"), NO_INTENT),
+            int(command.get("status_code") or 0),
+            math.nan if x is None else float(x),
+            math.nan if y is None else float(y),
+            time.time() if timestamp is None else timestamp,
+        )
+
+    def pack_into(self, buffer, offset: int = PAYLOAD_OFFSET) -> None:
+        """Serialize straight into a writable buffer"""
+        PAYLOAD.pack_into(
+            buffer, offset, self.intent_id, self.status_code, self.x, self.y, self.timestamp
+        )
+
+    @classmethod
+    def unpack_from(cls, buffer, offset: int = PAYLOAD_OFFSET) -> "CommandRecord":
+        """Deserialize from a buffer"""
+        return cls(*PAYLOAD.unpack_from(buffer, offset))
+
+    def to_command(self, intent_names: dict) -> dict:
+        """Convert back to a command dict (without raw text and reason phrase)"""
+        return {
+            "status_code": self.status_code,
+            "intent": intent_names.get(self.intent_id),
+            "x": None if math.isnan(self.x) else self.x,
+            "y": None if math.isnan(self.y) else self.y,
+            "timestamp": self.timestamp,
+        }
+
+
+class SharedMemoryOutputHandler:
+    """Publishes each command into a memory-mapped fixed-layout slot"""
+
+    def __init__(self, slot_file: str, manifest_file: str, intents: list):
+        """
+        Map the slot file and write the intent manifest
+
+        Args:
+            slot_file: Path of the memory-mapped slot file
+            manifest_file: Path of the JSON manifest mapping ids to intents
+            intents: Intent names; ids already in the manifest are kept, new
+                intents get the next free ids in this order
+        """
+        self.slot_path = Path(slot_file)
+        self.manifest_path = Path(manifest_file)
+        self.intent_ids = self._read_manifest_ids()
+        self.set_intents(intents)
+
+        self._file = open(self.slot_path, "a+b")
+        if os.path.getsize(self.slot_path) < SLOT_SIZE:
+            self._file.truncate(SLOT_SIZE)
+        self._buffer = mmap.mmap(self._file.fileno(), SLOT_SIZE)
+
+        # Keep counting from a previous run so readers never see it go back
+        magic, version = HEADER.unpack_from(self._buffer, 0)
+        sequence = 0
+        if magic == MAGIC and version == LAYOUT_VERSION:
+            sequence = SEQUENCE.unpack_from(self._buffer, SEQUENCE_OFFSET)[0]
+            sequence += sequence % 2
+        self._sequence = sequence
+        HEADER.pack_into(self._buffer, 0, MAGIC, LAYOUT_VERSION)
+        SEQUENCE.pack_into(self._buffer, SEQUENCE_OFFSET, self._sequence)
+        logger.info(f"✓ Shared-memory slot: '{self.slot_path}'")
+
+    def save_command(self, command: dict) -> None:
+        """Write command into the slot under the seqlock"""
+        try:
+            now = time.time()
+            command["timestamp"] = int(now)
+            record = CommandRecord.from_command(command, self.intent_ids, now)
+
+            SEQUENCE.pack_into(self._buffer, SEQUENCE_OFFSET, self._sequence + 1)
+            record.pack_into(self._buffer)
+            self._sequence += 2
+            SEQUENCE.pack_into(self._buffer, SEQUENCE_OFFSET, self._sequence)
+        except Exception as e:
+            logger.error(f"Failed to write shared-memory slot: {e}")
+
+    def save_batch(self, commands: list) -> None:
+        """
+        Write the commands of one utterance in order
+
+        The slot holds only the latest command, so a reader polling slower
+        than this may see only the last one; use the journal or socket
+        output when every command of a sequence matters.
+        """
+        for command in commands:
+            self.save_command(command)
+
+    def set_intents(self, intents: list) -> None:
+        """Give intents added by a settings reload the next free ids and rewrite the manifest"""
+        intent_ids = dict(self.intent_ids)
+        next_id = max(intent_ids.values(), default=-1) + 1
+        for intent in intents:
+            if intent not in intent_ids:
+                intent_ids[intent] = next_id
+                next_id += 1
+        # Manifest first: a reader seeing a new id must find it there
+        self._write_manifest(intent_ids)
+        self.intent_ids = intent_ids
+
+    def close(self) -> None:
+        """Unmap and close the slot file"""
+        self._buffer.close()
+        self._file.close()
+
+    def _read_manifest_ids(self) -> dict:
+        """Intent ids of an existing manifest of this layout, so they stay stable"""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") != LAYOUT_VERSION:
+                return {}
+            return {intent: int(index) for index, intent in manifest.get("intents", {}).items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _write_manifest(self, intent_ids: dict) -> None:
+        """Describe the layout and intent ids for consumers"""
+        manifest = {
+            "version": LAYOUT_VERSION,
+            "size": SLOT_SIZE,
+            "fields": {
+                "magic": {"offset": 0, "type": "char[4]"},
+                "version": {"offset": 4, "type": "uint32"},
+                "sequence": {"offset": SEQUENCE_OFFSET, "type": "uint64"},
+                "intent_id": {"offset": PAYLOAD_OFFSET, "type": "int32"},
+                "status_code": {"offset": PAYLOAD_OFFSET + 4, "type": "int32"},
+                "x": {"offset": PAYLOAD_OFFSET + 8, "type": "float64"},
+                "y": {"offset": PAYLOAD_OFFSET + 16, "type": "float64"},
+                "timestamp": {"offset": PAYLOAD_OFFSET + 24, "type": "float64"},
+            },
+            "no_intent": NO_INTENT,
+            "intents": {str(index): intent for intent, index in sorted(intent_ids.items(), key=lambda item: item[1])},
+        }
+        temp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+
+class SharedMemoryReader:
+    """Reads the command slot written by SharedMemoryOutputHandler"""
+
+    def __init__(self, slot_file: str, manifest_file: str = None):
+        self._file = open(slot_file, "rb")
+        self._buffer = mmap.mmap(self._file.fileno(), SLOT_SIZE, access=mmap.ACCESS_READ)
+        magic, version = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            raise ValueError(f"Not a version {LAYOUT_VERSION} command slot: {slot_file}")
+
+        self.manifest_file = manifest_file
+        self.intent_names = {}
+        self.reload_manifest()
+
+    def reload_manifest(self) -> None:
+        """Read the intent names from the manifest again"""
+        if not self.manifest_file or not os.path.exists(self.manifest_file):
+            return
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                intents = json.load(f).get("intents", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cannot read manifest '{self.manifest_file}': {e}")
+            return
+        self.intent_names = {int(index): intent for index, intent in intents.items()}
+
+    def names_for(self, record: CommandRecord) -> dict:
+        """
+        Intent names to decode record with
+
+        An id missing from the loaded manifest was added by a settings
+        reload after it was read, so the manifest is read again.
+        """
+        if record.intent_id != NO_INTENT and record.intent_id not in self.intent_names:
+            self.reload_manifest()
+        return self.intent_names
+
+    def read(self, max_attempts: int = 100) -> Optional[tuple]:
+        """
+        Read a consistent snapshot of the slot
+
+        Returns:
+            Tuple of (sequence, CommandRecord), or None if every attempt
+            overlapped a write
+        """
+        for _ in range(max_attempts):
+            before = SEQUENCE.unpack_from(self._buffer, SEQUENCE_OFFSET)[0]
+            if before % 2:
+                continue  # Write in progress
+            record = CommandRecord.unpack_from(self._buffer)
+            after = SEQUENCE.unpack_from(self._buffer, SEQUENCE_OFFSET)[0]
+            if before == after:
+                return before, record
+        return None
+
+    def close(self) -> None:
+        """Unmap and close the slot file"""
+        self._buffer.close()
+        self._file.close()
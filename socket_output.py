@@ -0,0 +1,256 @@
+"""
+Local Socket Output
+Pushes commands as newline-delimited JSON to subscribers on this machine.
+
+Transports:
+- tcp:  subscribers connect to host:port and read lines
+- unix: same as tcp over a Unix domain socket file (not available on Windows)
+- udp:  subscribers send "subscribe" to host:port and receive one datagram
+        per command; they must re-send it within SUBSCRIBER_TTL seconds
+"""
+
+import json
+import logging
+import os
+import queue
+import selectors
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SocketOutputHandler:
+    """Publishes commands to local socket subscribers without blocking the caller"""
+
+    # Commands waiting for the sender thread; newer ones are dropped when full
+    QUEUE_SIZE = 256
+
+    # A stream subscriber this far behind is disconnected
+    MAX_CLIENT_BUFFER = 256 * 1024
+
+    # UDP subscribers that have not re-subscribed for this long are dropped
+    SUBSCRIBER_TTL = 30.0
+
+    def __init__(
+        self,
+        transport: str = "tcp",
+        host: str = "127.0.0.1",
+        port: int = 47800,
+        path: str = "vox.sock",
+    ):
+        """
+        Bind the listening socket and start the sender thread
+
+        Args:
+            transport: "tcp", "udp" or "unix"
+            host: Bind address for tcp/udp (keep it on localhost)
+            port: Bind port for tcp/udp
+            path: Socket file path for unix
+
+        Raises:
+            ValueError: Unknown or unsupported transport
+            OSError: The socket could not be bound
+        """
+        self.transport = transport
+        self.path = path
+        self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._stopped = threading.Event()
+        self._clients = {}  # stream socket -> pending bytes
+        self._subscribers = {}  # udp address -> last subscribe time
+
+        if transport == "tcp":
+            self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._server.bind((host, port))
+            self._server.listen()
+            self.address = f"tcp://{host}:{port}"
+        elif transport == "udp":
+            self._server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._server.bind((host, port))
+            self.address = f"udp://{host}:{port}"
+        elif transport == "unix":
+            if not hasattr(socket, "AF_UNIX"):
+                raise ValueError("Unix sockets are not supported on this platform")
+            if os.path.exists(path):
+                os.unlink(path)  # Stale socket file from a previous run
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._server.bind(path)
+            self._server.listen()
+            self.address = f"unix://{path}"
+        else:
+            raise ValueError(f"Unknown socket transport '{transport}'")
+        self._server.setblocking(False)
+
+        # Lets save_command wake the sender thread out of select()
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._server, selectors.EVENT_READ)
+        self._selector.register(self._wake_reader, selectors.EVENT_READ)
+
+        self._thread = threading.Thread(
+            target=self._run, name="socket-output", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"✓ Publishing commands on {self.address}")
+
+    def save_command(self, command: dict) -> None:
+        """Queue command for all subscribers; never blocks"""
+        self.save_batch([command])
+
+    def save_batch(self, commands: list) -> None:
+        """Queue the commands of one utterance as consecutive lines; never blocks"""
+        now = int(time.time())
+        lines = []
+        for command in commands:
+            command["timestamp"] = now
+            lines.append((json.dumps(command, ensure_ascii=False) + "\n").encode("utf-8"))
+
+        try:
+            self._queue.put_nowait(lines)
+        except queue.Full:
+            logger.warning("Socket output queue full, dropping command")
+            return
+
+        try:
+            self._wake_writer.send(b"\0")
+        except OSError:
+            pass  # Wake buffer full: the thread is already awake
+
+    def close(self) -> None:
+        """Stop the sender thread and close all sockets"""
+        self._stopped.set()
+        try:
+            self._wake_writer.send(b"\0")
+        except OSError:
+            pass
+        self._thread.join(timeout=2.0)
+
+        for client in list(self._clients):
+            client.close()
+        self._selector.close()
+        self._server.close()
+        self._wake_reader.close()
+        self._wake_writer.close()
+        if self.transport == "unix" and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _run(self) -> None:
+        """Sender thread: accept subscribers and flush queued commands"""
+        while not self._stopped.is_set():
+            for key, events in self._selector.select(timeout=1.0):
+                sock = key.fileobj
+                if sock is self._wake_reader:
+                    self._drain_wake()
+                elif sock is self._server:
+                    self._accept()
+                else:
+                    if events & selectors.EVENT_READ:
+                        self._read_client(sock)
+                    if events & selectors.EVENT_WRITE and sock in self._clients:
+                        self._flush(sock)
+
+            while True:
+                try:
+                    lines = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._broadcast(lines)
+
+    def _drain_wake(self) -> None:
+        """Empty the wake-up socket"""
+        try:
+            while self._wake_reader.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def _accept(self) -> None:
+        """Register a new stream client or handle a UDP (un)subscribe"""
+        if self.transport == "udp":
+            try:
+                data, address = self._server.recvfrom(1024)
+            except OSError:
+                return  # e.g. ICMP port unreachable reported on Windows
+            message = data.strip().lower()
+            if message == b"unsubscribe":
+                self._subscribers.pop(address, None)
+            else:
+                if address not in self._subscribers:
+                    logger.info(f"Subscriber joined: {address[0]}:{address[1]}")
+                self._subscribers[address] = time.monotonic()
+            return
+
+        try:
+            client, _ = self._server.accept()
+        except OSError:
+            return
+        client.setblocking(False)
+        self._clients[client] = bytearray()
+        self._selector.register(client, selectors.EVENT_READ)
+        logger.info(f"Subscriber connected ({len(self._clients)} total)")
+
+    def _read_client(self, client: socket.socket) -> None:
+        """Discard anything a stream client sends; detect disconnects"""
+        try:
+            data = client.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(client, "disconnected")
+
+    def _broadcast(self, lines: list) -> None:
+        """Send the command lines of one utterance to every subscriber"""
+        if self.transport == "udp":
+            now = time.monotonic()
+            for address, seen in list(self._subscribers.items()):
+                if now - seen > self.SUBSCRIBER_TTL:
+                    del self._subscribers[address]
+                    continue
+                try:
+                    for line in lines:  # One datagram per command
+                        self._server.sendto(line, address)
+                except OSError:
+                    del self._subscribers[address]
+            return
+
+        line = b"".join(lines)
+        for client, pending in list(self._clients.items()):
+            if len(pending) + len(line) > self.MAX_CLIENT_BUFFER:
+                self._drop(client, "too slow")
+                continue
+            pending += line
+            self._flush(client)
+
+    def _flush(self, client: socket.socket) -> None:
+        """Write as much pending data as the client accepts right now"""
+        pending = self._clients[client]
+        try:
+            sent = client.send(pending)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._drop(client, "disconnected")
+            return
+        del pending[:sent]
+
+        events = selectors.EVENT_READ
+        if pending:
+            events |= selectors.EVENT_WRITE
+        self._selector.modify(client, events)
+
+    def _drop(self, client: socket.socket, reason: str) -> None:
+        """Forget a stream client"""
+        self._clients.pop(client, None)
+        try:
+            self._selector.unregister(client)
+        except (KeyError, ValueError):
+            pass
+        client.close()
+        logger.info(f"Subscriber {reason} ({len(self._clients)} remaining)")
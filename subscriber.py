@@ -0,0 +1,179 @@
+"""
+Reference Command Subscriber
+Prints commands pushed by the socket output (see socket_output.py), or
+polls the shared-memory slot (see shm_output.py).
+
+Usage:
+    python subscriber.py                      # use the "socket" block of settings.json
+    python subscriber.py --transport udp --port 47800
+    python subscriber.py --shm vox_command.shm
+"""
+
+import argparse
+import json
+import socket
+import sys
+import time
+from pathlib import Path
+
+SETTINGS_FILE = "settings.json"
+
+# UDP subscriptions expire on the publisher; refresh well before that
+RESUBSCRIBE_INTERVAL = 10.0
+
+# How often the shared-memory slot is polled
+SHM_POLL_INTERVAL = 0.005
+
+
+def load_socket_settings() -> dict:
+    """Read the "socket" block of settings.json, if any"""
+    try:
+        settings = json.loads(Path(SETTINGS_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return settings.get("socket", {})
+
+
+def print_command(line) -> None:
+    """Print one received command (JSON line or already-decoded dict)"""
+    if isinstance(line, dict):
+        command = line
+    else:
+        try:
+            command = json.loads(line)
+        except ValueError:
+            print(f"Malformed line: {line!r}", file=sys.stderr)
+            return
+
+    received = time.time()
+    print(
+        f"[{time.strftime('%H:%M:%S')}] {command.get('status_code')} "
+        f"{command.get('intent')} x={command.get('x')} y={command.get('y')} "
+        f"(sent {command.get('timestamp')}, received {received:.3f})",
+        flush=True,
+    )
+
+
+def _connect(family: int, address) -> socket.socket:
+    """Open a stream connection to the publisher"""
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def follow_stream(connect) -> None:
+    """Read newline-delimited commands, reconnecting when the publisher goes away"""
+    while True:
+        try:
+            sock = connect()
+        except OSError as e:
+            print(f"Waiting for publisher ({e})", file=sys.stderr)
+            time.sleep(1.0)
+            continue
+
+        print("Connected", file=sys.stderr)
+        buffer = b""
+        with sock:
+            while True:
+                try:
+                    data = sock.recv(65536)
+                except OSError:
+                    data = b""
+                if not data:
+                    print("Publisher closed the connection", file=sys.stderr)
+                    break
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if line:
+                        print_command(line)
+
+
+def follow_udp(host: str, port: int) -> None:
+    """Subscribe over UDP and print each datagram"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(1.0)
+    last_subscribe = 0.0
+
+    try:
+        while True:
+            if time.monotonic() - last_subscribe > RESUBSCRIBE_INTERVAL:
+                sock.sendto(b"subscribe", (host, port))
+                last_subscribe = time.monotonic()
+            try:
+                data, _ = sock.recvfrom(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                # Publisher not running yet (reported as a reset on Windows)
+                time.sleep(1.0)
+                last_subscribe = 0.0
+                continue
+            print_command(data.strip())
+    finally:
+        try:
+            sock.sendto(b"unsubscribe", (host, port))
+        except OSError:
+            pass
+        sock.close()
+
+
+def follow_shm(slot_file: str) -> None:
+    """Poll the shared-memory slot and print each new command"""
+    from shm_output import SharedMemoryReader
+
+    manifest_file = str(Path(slot_file).with_suffix(".manifest.json"))
+    while True:
+        try:
+            reader = SharedMemoryReader(slot_file, manifest_file)
+            break
+        except (OSError, ValueError) as e:
+            print(f"Waiting for publisher ({e})", file=sys.stderr)
+            time.sleep(1.0)
+
+    last_sequence = None
+    try:
+        while True:
+            snapshot = reader.read()
+            if snapshot and snapshot[0] != last_sequence:
+                sequence, record = snapshot
+                if last_sequence is not None and sequence > 0:
+                    print_command(record.to_command(reader.names_for(record)))
+                last_sequence = sequence
+            time.sleep(SHM_POLL_INTERVAL)
+    finally:
+        reader.close()
+
+
+def main():
+    defaults = load_socket_settings()
+    parser = argparse.ArgumentParser(description="Print commands pushed over a local socket")
+    parser.add_argument(
+        "--transport", choices=("tcp", "udp", "unix"), default=defaults.get("transport", "tcp")
+    )
+    parser.add_argument("--host", default=defaults.get("host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=defaults.get("port", 47800))
+    parser.add_argument("--path", default=defaults.get("path", "vox.sock"))
+    parser.add_argument("--shm", metavar="SLOT_FILE", help="Poll a shared-memory slot file instead")
+    args = parser.parse_args()
+
+    try:
+        if args.shm:
+            follow_shm(args.shm)
+        elif args.transport == "udp":
+            follow_udp(args.host, args.port)
+        elif args.transport == "unix":
+            follow_stream(lambda: _connect(socket.AF_UNIX, args.path))
+        else:
+            follow_stream(lambda: _connect(socket.AF_INET, (args.host, args.port)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()